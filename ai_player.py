@@ -0,0 +1,168 @@
+import os
+import queue
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import BitBoard
+from mcts import mcts_search
+from parallel_search import ParallelSearch
+from search import iterative_deepening
+from tablebase import TABLEBASE_MODES, load_tablebase
+from transposition import TranspositionTable
+
+# Per-move thinking time for the searching AI levels, in milliseconds.
+AI_TIME_BUDGET_MS = {
+    "medium": 200,
+    "hard": 800,
+}
+
+# Worker processes for the "mcts" and "parallel" AI backends.
+AI_WORKERS = os.cpu_count() or 1
+
+DIFFICULTIES = ("easy", "medium", "hard")
+BACKENDS = ("search", "parallel", "mcts")
+
+
+def swap_players(board):
+    # The alpha-beta searches always play "O"; hand them the board with the marks swapped.
+    return BitBoard.from_2d([[{"X": "O", "O": "X"}.get(value) for value in row] for row in board.to_2d()])
+
+
+class AIPlayer:
+    """The computer player's move selection, without any pygame state.
+
+    GameController and the headless tools share it, so a tournament plays
+    exactly the moves the game would. Keeps the transposition table, the
+    solved tablebases and the backends' worker pools between moves.
+    """
+
+    def __init__(self, workers=AI_WORKERS, budgets=None):
+        self.workers = workers
+        self.budgets = dict(AI_TIME_BUDGET_MS if budgets is None else budgets)
+        self.table = TranspositionTable()
+        # Solved tables are optional; modes without one fall back to search.
+        self.tablebases = {mode: load_tablebase(mode) for mode in TABLEBASE_MODES}
+        self.mcts_executor = None
+        self.parallel_search = None
+
+    def search_move(self, board, mode, difficulty, player="O", backend="search", rng=random, cancel=None):
+        tablebase = self.tablebases.get(mode)
+        if tablebase is not None:
+            entry = tablebase.probe(board)
+            if entry is not None and entry[1] is not None:
+                return entry[1]
+        budget_ms = self.budgets[difficulty]
+        if backend == "mcts":
+            if self.workers > 1 and self.mcts_executor is None:
+                self.mcts_executor = ProcessPoolExecutor(max_workers=self.workers)
+            result = mcts_search(board, mode, player, budget_ms=budget_ms, workers=self.workers,
+                                 executor=self.mcts_executor, seed=rng.randrange(1 << 30), cancel=cancel)
+            return result.move
+        if player == "X":
+            board = swap_players(board)
+        if backend == "parallel":
+            if self.parallel_search is None:
+                self.parallel_search = ParallelSearch(self.workers)
+            score, move, depth = self.parallel_search.iterative_deepening(board, mode, budget_ms, cancel)
+            return move
+        score, move, depth = iterative_deepening(board, mode, budget_ms, self.table, cancel=cancel)
+        return move
+
+    def choose_move(self, board, mode, difficulty, player="O", backend="search", rng=random, cancel=None):
+        """Pick `player`'s move on `board` (left unchanged) for an AI level; None if the board is full.
+
+        Setting the `cancel` event cuts the search short; only MCTS trees
+        running in a process pool (workers > 1) run out their time budget.
+        """
+        board = board.copy()
+        available_moves = board.empty_cells()
+        if not available_moves:
+            return None
+        self.table.new_search()
+        if difficulty == "easy":
+            return rng.choice(available_moves)
+        if difficulty == "medium" and rng.random() < 0.5:
+            return rng.choice(available_moves)
+        return self.search_move(board, mode, difficulty, player, backend, rng, cancel)
+
+    def close(self):
+        if self.mcts_executor is not None:
+            self.mcts_executor.shutdown()
+            self.mcts_executor = None
+        if self.parallel_search is not None:
+            self.parallel_search.close()
+            self.parallel_search = None
+        for tablebase in self.tablebases.values():
+            if tablebase is not None:
+                tablebase.close()
+        self.tablebases = {}
+
+
+class AIWorker:
+    """Runs AIPlayer.choose_move on a background thread.
+
+    request() hands the worker a copy of the position and returns at once;
+    the main loop then calls poll() every frame until the move arrives, or
+    until it re-raises the exception the search failed with. cancel()
+    abandons the pending request: its search is told to stop and whatever
+    it returns is dropped.
+    """
+
+    def __init__(self, ai):
+        self.ai = ai
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.job = 0
+        self.pending = None
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="ai-worker", daemon=True)
+        self.thread.start()
+
+    @property
+    def busy(self):
+        return self.pending is not None
+
+    def request(self, board, mode, difficulty, player="O", backend="search"):
+        self.cancel()
+        self.job += 1
+        self.pending = self.job
+        self.cancel_event = threading.Event()
+        self.requests.put((self.job, board.copy(), mode, difficulty, player, backend, self.cancel_event))
+
+    def poll(self):
+        """Return the pending request's move once it is ready, else None; raises the search's error if it failed."""
+        while True:
+            try:
+                job, move, error = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if job == self.pending:
+                self.pending = None
+                if error is not None:
+                    raise error
+                return move
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.pending = None
+
+    def run(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                return
+            job, board, mode, difficulty, player, backend, cancel = item
+            if cancel.is_set():
+                continue
+            move = error = None
+            try:
+                move = self.ai.choose_move(board, mode, difficulty, player, backend, cancel=cancel)
+            except Exception as e:
+                # Handed to the main loop, which decides what to do about it.
+                error = e
+            self.results.put((job, move, error))
+
+    def close(self):
+        self.cancel()
+        self.requests.put(None)
+        self.thread.join()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+from bitboard import BitBoard
+from game_model import board_to_2d, check_draw, check_game_winner, count_exact_sequences
+from rules import MODES, get_rules
+from search import Search
+from ui_helpers import create_cells
+
+# Search depth per mode for the minimax benchmark; None searches to the end.
+SEARCH_DEPTHS = {"3x3": None, "4x4": 4, "5x5": 3}
+DEFAULT_SEARCH_DEPTH = 2
+
+# A benchmark regresses when its ns/op grows by more than this fraction over the baseline.
+DEFAULT_THRESHOLD = 0.10
+
+CORPUS_SEED = 2024
+
+
+def random_position(rules, marks, rng):
+    # Alternate X and O on random cells, retrying until nobody has won.
+    while True:
+        board = BitBoard(rules.rows, rules.cols)
+        cells = [(row, col) for row in range(rules.rows) for col in range(rules.cols)]
+        rng.shuffle(cells)
+        for i, (row, col) in enumerate(cells[:marks]):
+            board.place(row, col, "XO"[i % 2])
+        if board.winner(rules.name) is None:
+            return board.to_2d()
+
+
+def position_corpus(mode):
+    """The fixed empty, midgame and near-terminal positions for a mode, "O" to move."""
+    rules = get_rules(mode)
+    rng = random.Random(f"{CORPUS_SEED}:{mode}")
+    # Odd mark counts leave "O" to move, as the search expects.
+    midgame = rules.cells // 2 | 1
+    near_terminal = (rules.cells - 3) | 1
+    return {
+        "empty": [[None] * rules.cols for _ in range(rules.rows)],
+        "midgame": random_position(rules, midgame, rng),
+        "near-terminal": random_position(rules, near_terminal, rng),
+    }
+
+
+def grid_cells(grid):
+    cells = create_cells(0, 0, 10, len(grid), len(grid[0]))
+    for cell in cells:
+        cell.value = grid[cell.row][cell.col]
+    return cells
+
+
+def peak_bytes(func):
+    """Peak Python memory allocated during one call, in bytes."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def time_call(func, repeat):
+    # Best of `repeat` autoranged runs (each at least 0.2s), in ns per call.
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e9
+
+
+def search_benchmark(mode, grid):
+    board = BitBoard.from_2d(grid)
+    depth = SEARCH_DEPTHS.get(mode, DEFAULT_SEARCH_DEPTH)
+    state = {}
+
+    def run():
+        search = Search(mode, max_depth=depth)
+        search.minimax(board.copy(), 0, True, -float("inf"), float("inf"))
+        state["nodes"] = search.nodes
+
+    return run, state
+
+
+def benchmarks(mode):
+    """Yield (name, func, search_state) for every benchmark of `mode`."""
+    rules = get_rules(mode)
+    lengths = sorted({length for length, _ in rules.conditions})
+    for position, grid in position_corpus(mode).items():
+        prefix = f"{mode}/{position}"
+        cells = grid_cells(grid)
+        # Default arguments bind this position's grid and cells to each closure.
+        yield (f"{prefix}/count_exact_sequences",
+               lambda grid=grid: [count_exact_sequences(grid, "X", length) for length in lengths], None)
+        yield f"{prefix}/check_game_winner", lambda cells=cells: check_game_winner(cells, rules.rows, mode), None
+        yield f"{prefix}/board_to_2d", lambda cells=cells: board_to_2d(cells, rules.rows), None
+        yield f"{prefix}/check_draw", lambda cells=cells: check_draw(cells), None
+        run, state = search_benchmark(mode, grid)
+        yield f"{prefix}/minimax", run, state
+
+
+def run_benchmarks(modes, repeat=5, name_filter=None):
+    results = {}
+    for mode in modes:
+        for name, func, search_state in benchmarks(mode):
+            if name_filter and name_filter not in name:
+                continue
+            ns_per_op = time_call(func, repeat)
+            result = {"ns_per_op": round(ns_per_op, 1), "peak_bytes": peak_bytes(func)}
+            if search_state is not None:
+                result["nodes"] = search_state["nodes"]
+                result["nodes_per_second"] = round(search_state["nodes"] / (ns_per_op / 1e9))
+            results[name] = result
+            line = f"{name:45} {ns_per_op:14,.0f} ns/op {result['peak_bytes']:10,} B peak"
+            if search_state is not None:
+                line += f" {result['nodes_per_second']:12,} nodes/s"
+            print(line, flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the ns/op change against `baseline`; return the names that regressed."""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = result["ns_per_op"] / old["ns_per_op"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:45} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game engine on fixed positions.")
+    parser.add_argument("--mode", nargs="+", default=sorted(MODES), choices=sorted(MODES))
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier --output run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed ns/op slowdown as a fraction (default 0.10)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.mode, args.repeat, args.filter)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": results}, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import random
+from rules import win_conditions
+
+PLAYERS = ("X", "O")
+
+
+class BoardMasks:
+    """Precomputed bit layout for one board shape.
+
+    Cells are stored row-major with one empty guard column per row, so shifting
+    a row, diagonal or anti-diagonal past the board edge lands on a guard bit
+    instead of wrapping onto the next row.
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 1
+        # Horizontal, vertical, diagonal and anti-diagonal neighbour distances.
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+        self.cell_bits = [[1 << (row * self.stride + col) for col in range(cols)] for row in range(rows)]
+        self.full = 0
+        for row in self.cell_bits:
+            for bit in row:
+                self.full |= bit
+
+        # Rotations/reflections that map the board onto itself: all eight of
+        # the dihedral group D4 for a square, the four without a transpose otherwise.
+        last_r, last_c = rows - 1, cols - 1
+        transforms = [
+            lambda r, c: (r, c),
+            lambda r, c: (last_r - r, last_c - c),
+            lambda r, c: (r, last_c - c),
+            lambda r, c: (last_r - r, c),
+        ]
+        if rows == cols:
+            transforms += [
+                lambda r, c: (c, last_r - r),
+                lambda r, c: (last_c - c, r),
+                lambda r, c: (c, r),
+                lambda r, c: (last_c - c, last_r - r),
+            ]
+        self.symmetries = [[[t(r, c) for c in range(cols)] for r in range(rows)] for t in transforms]
+        self.inverse_symmetries = []
+        for table in self.symmetries:
+            inverse = [[None] * cols for _ in range(rows)]
+            for r in range(rows):
+                for c in range(cols):
+                    tr, tc = table[r][c]
+                    inverse[tr][tc] = (r, c)
+            self.inverse_symmetries.append(inverse)
+
+        # Zobrist keys: zobrist[player][r][c][k] is the key of (r, c) seen through symmetry k,
+        # so every orientation of the position can be hashed incrementally at once.
+        rng = random.Random(rows * 1000 + cols)
+        base = {player: [[rng.getrandbits(64) for _ in range(cols)] for _ in range(rows)] for player in PLAYERS}
+        self.zobrist = {
+            player: [[tuple(base[player][tr][tc] for tr, tc in (table[r][c] for table in self.symmetries))
+                      for c in range(cols)] for r in range(rows)]
+            for player in PLAYERS
+        }
+        self.side_key = rng.getrandbits(64)
+
+        self._windows = {}
+
+    def index_to_cell(self, index):
+        return divmod(index, self.stride)
+
+    def on_board(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def windows(self, length):
+        """All straight segments of `length` cells as (window_mask, caps_mask) pairs.
+
+        `caps_mask` covers the cells just before and after the segment, so a
+        player owning the window but neither cap has a run of exactly `length`.
+        """
+        windows = self._windows.get(length)
+        if windows is None:
+            windows = []
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                for r in range(self.rows):
+                    for c in range(self.cols):
+                        end_r, end_c = r + dr * (length - 1), c + dc * (length - 1)
+                        if not self.on_board(end_r, end_c):
+                            continue
+                        window = 0
+                        for k in range(length):
+                            window |= self.cell_bits[r + dr * k][c + dc * k]
+                        caps = 0
+                        for cap_r, cap_c in ((r - dr, c - dc), (end_r + dr, end_c + dc)):
+                            if self.on_board(cap_r, cap_c):
+                                caps |= self.cell_bits[cap_r][cap_c]
+                        windows.append((window, caps))
+            self._windows[length] = windows
+        return windows
+
+    def dilate(self, bits):
+        # `bits` plus every cell adjacent to one of them, in all eight directions.
+        grown = bits
+        for shift in self.shifts:
+            grown |= (bits << shift) | (bits >> shift)
+        return grown & self.full
+
+
+_MASKS = {}
+
+
+def get_masks(rows, cols=None):
+    cols = rows if cols is None else cols
+    masks = _MASKS.get((rows, cols))
+    if masks is None:
+        masks = _MASKS[(rows, cols)] = BoardMasks(rows, cols)
+    return masks
+
+
+def count_exact_runs(bits, masks, length):
+    """Count maximal runs of exactly `length` marks in all four directions."""
+    count = 0
+    for shift in masks.shifts:
+        # A run starts where the previous cell in this direction is not ours.
+        run = bits & ~(bits << shift)
+        for k in range(1, length):
+            run &= bits >> (k * shift)
+        run &= ~(bits >> (length * shift))
+        count += run.bit_count()
+    return count
+
+
+def iter_cells(bits, masks):
+    while bits:
+        low = bits & -bits
+        yield masks.index_to_cell(low.bit_length() - 1)
+        bits ^= low
+
+
+class BitBoard:
+    """Both players' marks plus incrementally maintained run counts.
+
+    `run_counts[player][L]` is the number of maximal runs of exactly L marks
+    over all four directions. `place` and `remove` only walk the four lines
+    through the changed cell, so win and draw checks never rescan the board.
+    """
+
+    def __init__(self, rows, cols=None):
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        self.masks = get_masks(self.rows, self.cols)
+        self.bits = {"X": 0, "O": 0}
+        self.run_counts = {player: [0] * (max(self.rows, self.cols) + 1) for player in PLAYERS}
+        self.empty_count = self.rows * self.cols
+        # One Zobrist hash per symmetry; the smallest is the canonical key.
+        self.hashes = [0] * len(self.masks.symmetries)
+
+    @classmethod
+    def from_cells(cls, cells, rows, cols=None):
+        board = cls(rows, cols)
+        for cell in cells:
+            if cell.value is not None:
+                board.place(cell.row, cell.col, cell.value)
+        return board
+
+    @classmethod
+    def from_2d(cls, grid):
+        board = cls(len(grid), len(grid[0]))
+        for i, row in enumerate(grid):
+            for j, value in enumerate(row):
+                if value is not None:
+                    board.place(i, j, value)
+        return board
+
+    def copy(self):
+        board = BitBoard(self.rows, self.cols)
+        board.bits = dict(self.bits)
+        board.run_counts = {player: list(counts) for player, counts in self.run_counts.items()}
+        board.empty_count = self.empty_count
+        board.hashes = list(self.hashes)
+        return board
+
+    def to_2d(self):
+        grid = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        for player in PLAYERS:
+            for i, j in iter_cells(self.bits[player], self.masks):
+                grid[i][j] = player
+        return grid
+
+    def get(self, row, col):
+        bit = self.masks.cell_bits[row][col]
+        for player in PLAYERS:
+            if self.bits[player] & bit:
+                return player
+        return None
+
+    def _neighbour_runs(self, bits, bit, shift):
+        # Lengths of the runs of `bits` directly before and after `bit` along `shift`.
+        before = 0
+        probe = bit >> shift
+        while bits & probe:
+            before += 1
+            probe >>= shift
+        after = 0
+        probe = bit << shift
+        while bits & probe:
+            after += 1
+            probe <<= shift
+        return before, after
+
+    def place(self, row, col, player):
+        bit = self.masks.cell_bits[row][col]
+        bits = self.bits[player]
+        counts = self.run_counts[player]
+        for shift in self.masks.shifts:
+            before, after = self._neighbour_runs(bits, bit, shift)
+            # The new mark joins the runs on either side into one longer run.
+            if before:
+                counts[before] -= 1
+            if after:
+                counts[after] -= 1
+            counts[before + after + 1] += 1
+        self.bits[player] = bits | bit
+        self.empty_count -= 1
+        keys = self.masks.zobrist[player][row][col]
+        self.hashes = [h ^ k for h, k in zip(self.hashes, keys)]
+
+    def remove(self, row, col, player):
+        bit = self.masks.cell_bits[row][col]
+        bits = self.bits[player] & ~bit
+        counts = self.run_counts[player]
+        for shift in self.masks.shifts:
+            before, after = self._neighbour_runs(bits, bit, shift)
+            counts[before + after + 1] -= 1
+            if before:
+                counts[before] += 1
+            if after:
+                counts[after] += 1
+        self.bits[player] = bits
+        self.empty_count += 1
+        keys = self.masks.zobrist[player][row][col]
+        self.hashes = [h ^ k for h, k in zip(self.hashes, keys)]
+
+    def empty_bits(self):
+        return self.masks.full & ~(self.bits["X"] | self.bits["O"])
+
+    def empty_cells(self):
+        return list(iter_cells(self.empty_bits(), self.masks))
+
+    def nearby_empty_cells(self):
+        """Empty cells next to a mark, or the centre cell on an empty board."""
+        if self.empty_count == self.rows * self.cols:
+            return [(self.rows // 2, self.cols // 2)]
+        occupied = self.bits["X"] | self.bits["O"]
+        return list(iter_cells(self.masks.dilate(occupied) & ~occupied, self.masks))
+
+    def is_full(self):
+        return self.empty_count == 0
+
+    def count_exact(self, player, length):
+        if length >= len(self.run_counts["X"]):
+            return 0
+        return self.run_counts[player][length]
+
+    def has_won(self, player, mode):
+        for length, needed in win_conditions(mode):
+            if self.count_exact(player, length) >= needed:
+                return True
+        return False
+
+    def winner(self, mode):
+        for player in PLAYERS:
+            if self.has_won(player, mode):
+                return player
+        return None
+
+    def canonical_key(self, o_to_move=True):
+        """Return (key, symmetry) for the position under its canonical orientation."""
+        key = min(self.hashes)
+        symmetry = self.hashes.index(key)
+        if o_to_move:
+            key ^= self.masks.side_key
+        return key, symmetry
+
+    def to_canonical(self, move, symmetry):
+        if move is None:
+            return None
+        return self.masks.symmetries[symmetry][move[0]][move[1]]
+
+    def from_canonical(self, move, symmetry):
+        if move is None:
+            return None
+        return self.masks.inverse_symmetries[symmetry][move[0]][move[1]]
@@ -1,5 +1,50 @@
-import mysql.connector
-from mysql.connector import Error
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+try:
+    import mysql.connector
+    from mysql.connector import Error, InterfaceError, OperationalError
+except ImportError:
+    # Without the MySQL driver only the "sqlite" backend is available. The
+    # driver's exception types become placeholders that nothing raises, so
+    # they do not widen the except clauses below to every sqlite3.Error.
+    mysql = None
+
+    class Error(Exception):
+        pass
+
+    class InterfaceError(Error):
+        pass
+
+    class OperationalError(Error):
+        pass
+
+# Errors that mean a query or a connection failed, for either backend.
+DB_ERRORS = (Error, sqlite3.Error)
+# The subset worth retrying on a new connection (lost server, dropped socket).
+CONNECTION_ERRORS = (InterfaceError, OperationalError, sqlite3.OperationalError)
+
+# Settings come from this JSON file (if present) and then TTT_DB_* environment variables.
+CONFIG_PATH = os.environ.get("TTT_DB_CONFIG", "db_config.json")
+DEFAULT_CONFIG = {
+    "backend": "mysql",   # "mysql" or "sqlite"
+    "host": "localhost",
+    "user": "root",
+    "password": "",
+    "database": "tic_tac_toe_db",
+    "path": "tic_tac_toe.db",  # SQLite file, for the "sqlite" backend
+    "pool_min": 1,
+    "pool_max": 4,
+    "pool_timeout": 5.0,  # seconds to wait for a free connection
+    "spool_path": "results_spool.jsonl",  # results waiting to be written
+    "move_log_path": "games.tttm",  # binary move log of every finished game
+    "trivia_tags": "",  # comma-separated tags every trivia question must have, e.g. "region:europe"
+    "trivia_exclude_tags": "",  # comma-separated tags no trivia question may have
+}
 
 def create_connection(host_name, user_name, user_password, db_name):
     connection = None
@@ -34,3 +79,228 @@ def execute_read_query(connection, query):
     except Error as e:
         print(f"The error '{e}' occurred")
         return result
+
+def load_db_config(path=None):
+    """Database settings: DEFAULT_CONFIG, overridden by the JSON config file, then by TTT_DB_<KEY> variables."""
+    config = dict(DEFAULT_CONFIG)
+    path = path or CONFIG_PATH
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                config.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"The error '{e}' occurred")
+    for key, default in DEFAULT_CONFIG.items():
+        value = os.environ.get(f"TTT_DB_{key.upper()}")
+        if value is not None:
+            config[key] = type(default)(value)
+    return config
+
+def make_connector(config):
+    """Return a zero-argument function that opens one connection for `config`."""
+    if config["backend"] == "sqlite":
+        # Pooled connections may be used from more than one thread.
+        return lambda: sqlite3.connect(config["path"], check_same_thread=False)
+    if mysql is None:
+        raise ValueError('The "mysql" backend needs mysql-connector-python; install it or use "sqlite"')
+    return lambda: mysql.connector.connect(
+        host=config["host"],
+        user=config["user"],
+        password=config["password"],
+        database=config["database"],
+    )
+
+def ping(connection):
+    # Health check on checkout: MySQL connections can ping, anything else runs a trivial query.
+    try:
+        if hasattr(connection, "is_connected"):
+            return connection.is_connected()
+        connection.execute("SELECT 1")
+        return True
+    except DB_ERRORS:
+        return False
+
+class ConnectionPool:
+    """A thread-safe pool of open connections made by `connect`.
+
+    Opens `min_size` connections up front and never more than `max_size` in
+    all; callers beyond that wait up to `timeout` seconds for a release.
+    Connections are health-checked on checkout and replaced when the check
+    fails; execute() also retries once when a query fails with a connection
+    error.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=4, timeout=5.0, health_check=ping, backend="mysql"):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(f"Bad pool size {min_size}..{max_size}")
+        self.connect = connect
+        self.backend = backend
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check = health_check
+        self.idle = deque()
+        self.size = 0  # open connections, idle or checked out
+        self.condition = threading.Condition()
+        self.stats = {"opened": 0, "reused": 0, "replaced": 0, "reconnects": 0}
+        for _ in range(min_size):
+            connection = self.open()
+            if connection is None:
+                break
+            self.release(connection)
+
+    def open(self):
+        with self.condition:
+            if self.size >= self.max_size:
+                return None
+            self.size += 1
+        try:
+            connection = self.connect()
+        except DB_ERRORS as e:
+            print(f"The error '{e}' occurred")
+            connection = None
+        with self.condition:
+            if connection is None:
+                self.size -= 1
+                self.condition.notify()
+            else:
+                self.stats["opened"] += 1
+        return connection
+
+    def acquire(self):
+        """Check out a healthy connection, or return None if none could be opened in time."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        print(f"The error 'no free database connection after {self.timeout}s' occurred")
+                        return None
+                    self.condition.wait(remaining)
+                connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                return self.open()
+            if self.health_check is None or self.health_check(connection):
+                with self.condition:
+                    self.stats["reused"] += 1
+                return connection
+            with self.condition:
+                self.stats["replaced"] += 1
+            self.discard(connection)
+
+    def release(self, connection):
+        with self.condition:
+            self.idle.append(connection)
+            self.condition.notify()
+
+    def discard(self, connection):
+        # Close a broken connection and free its slot.
+        try:
+            connection.close()
+        except DB_ERRORS:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """`with pool.connection() as connection:`; the connection is None if none was available."""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            # A connection broken meanwhile is caught by the next checkout's health check.
+            if connection is not None:
+                self.release(connection)
+
+    def execute(self, query, params=None):
+        if params is None:
+            return self.transaction(lambda cursor: cursor.execute(query))
+        return self.transaction(lambda cursor: cursor.execute(query, params))
+
+    def executemany(self, query, rows):
+        """Run one parameterized statement for every row in one transaction; returns True on success."""
+        return self.transaction(lambda cursor: cursor.executemany(query, rows))
+
+    def query(self, query, params=None):
+        """Run a read query and return all rows, or None if it failed."""
+        with self.connection() as connection:
+            if connection is None:
+                return None
+            cursor = connection.cursor()
+            try:
+                if params is None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query, params)
+                return cursor.fetchall()
+            except DB_ERRORS as e:
+                print(f"The error '{e}' occurred")
+                return None
+            finally:
+                cursor.close()
+
+    def transaction(self, work):
+        """Call work(cursor) on one connection and commit; returns True on success.
+
+        Everything `work` executes commits or rolls back together. A
+        connection error (for SQLite, any OperationalError) is retried once
+        on another connection, so a server restart or a dropped idle
+        connection costs one reconnect, not a result. Other errors, such as
+        constraint violations, are rolled back and not retried.
+        """
+        for attempt in range(2):
+            connection = self.acquire()
+            if connection is None:
+                return False
+            try:
+                cursor = connection.cursor()
+                work(cursor)
+                connection.commit()
+                cursor.close()
+            except CONNECTION_ERRORS as e:
+                print(f"The error '{e}' occurred")
+                self.discard(connection)
+                if attempt == 0:
+                    with self.condition:
+                        self.stats["reconnects"] += 1
+                continue
+            except DB_ERRORS as e:
+                print(f"The error '{e}' occurred")
+                try:
+                    connection.rollback()
+                except DB_ERRORS:
+                    pass
+                self.release(connection)
+                return False
+            self.release(connection)
+            return True
+        return False
+
+    def close(self):
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+        for connection in idle:
+            self.discard(connection)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool(config=None):
+    """The process-wide pool, created from `config` (or load_db_config()) on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = config or load_db_config()
+            _pool = ConnectionPool(make_connector(config), int(config["pool_min"]), int(config["pool_max"]),
+                                   float(config["pool_timeout"]), backend=config["backend"])
+        return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,80 @@
+from bitboard import iter_cells
+from rules import win_conditions
+
+# Scores are from "O"'s point of view and stay well below search.MATE_THRESHOLD.
+RUN_WEIGHT = 40             # a finished exact run counting toward a multi-run rule
+THREAT_WEIGHT = 150         # an empty cell that would win on the next move
+DOUBLE_THREAT_SCORE = 2500  # two winning cells for the side not to move: only one can be blocked
+TO_MOVE_WIN_SCORE = 3500    # the side to move can win right now
+MAX_EVAL = 4000
+
+# Boards with more cells than this only consider moves next to existing marks.
+FULL_WIDTH_CELLS = 25
+
+
+def opponent_of(player):
+    return "O" if player == "X" else "X"
+
+
+def winning_cells(board, player, mode):
+    """Return the empty cells where `player` would satisfy the mode's win rule."""
+    mine = board.bits[player]
+    theirs = board.bits[opponent_of(player)]
+    candidates = 0
+    # A winning move must complete some exact run: a window missing one mark,
+    # holding no opposing mark and not extended by our own marks at either end.
+    for length, needed in win_conditions(mode):
+        for window, caps in board.masks.windows(length):
+            if window & theirs or caps & mine:
+                continue
+            gap = window & ~mine
+            if gap and not gap & (gap - 1):
+                candidates |= gap
+    cells = []
+    for row, col in iter_cells(candidates, board.masks):
+        board.place(row, col, player)
+        if board.has_won(player, mode):
+            cells.append((row, col))
+        board.remove(row, col, player)
+    return cells
+
+
+def candidate_moves(board):
+    if board.rows * board.cols <= FULL_WIDTH_CELLS:
+        return board.empty_cells()
+    return board.nearby_empty_cells()
+
+
+def player_score(board, player, mode):
+    # Open windows score by how full they are; finished runs score toward the run count.
+    mine = board.bits[player]
+    theirs = board.bits[opponent_of(player)]
+    score = 0
+    for length, needed in win_conditions(mode):
+        score += board.count_exact(player, length) * RUN_WEIGHT // needed
+        for window, caps in board.masks.windows(length):
+            if window & theirs or caps & mine:
+                continue
+            marks = (window & mine).bit_count()
+            if marks < length:
+                score += marks * marks
+    return score
+
+
+def evaluate_position(board, mode, o_to_move):
+    """Static score of a non-terminal position, positive when "O" is ahead."""
+    o_wins = winning_cells(board, "O", mode)
+    x_wins = winning_cells(board, "X", mode)
+    if o_to_move:
+        if o_wins:
+            return TO_MOVE_WIN_SCORE
+        if len(x_wins) >= 2:
+            return -DOUBLE_THREAT_SCORE
+    else:
+        if x_wins:
+            return -TO_MOVE_WIN_SCORE
+        if len(o_wins) >= 2:
+            return DOUBLE_THREAT_SCORE
+    score = player_score(board, "O", mode) - player_score(board, "X", mode)
+    score += THREAT_WEIGHT * (len(o_wins) - len(x_wins))
+    return max(-MAX_EVAL, min(MAX_EVAL, score))
@@ -0,0 +1,215 @@
+import argparse
+import csv
+import json
+import os
+import time
+from database import load_db_config
+from move_log import MoveLog
+from storage import EXPORT_FETCH_SIZE, RESULT_COLUMNS, close_storage, get_storage
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Without pyarrow only the "csv" format is available.
+    pa = pq = None
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+
+# Output columns and their Arrow types; CSV writes the same columns.
+RESULT_FIELDS = (("row_id", "int64"),) + tuple((column, "string") for column in RESULT_COLUMNS)
+MOVE_FIELDS = (
+    ("game", "int64"),  # position of the game in the move log
+    ("record_id", "string"),
+    ("timestamp", "int64"),  # unix time the game was logged
+    ("mode", "string"),
+    ("player1", "string"),
+    ("player2", "string"),
+    ("winner", "string"),  # "X", "O" or "Draw"
+    ("ply", "int16"),
+    ("player", "string"),
+    ("row", "int16"),
+    ("col", "int16"),
+)
+
+# Move rows buffered per written batch.
+MOVE_CHUNK_SIZE = 50000
+
+CHECKPOINT_NAME = "checkpoint.json"
+
+
+class CSVSink:
+    def __init__(self, path, fields):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in fields])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowSink:
+    """Writes each chunk of rows as one Parquet row group or Arrow IPC record batch."""
+
+    def __init__(self, path, fields, file_format):
+        if pa is None:
+            raise ValueError(f'The "{file_format}" format needs pyarrow; install it or use "csv"')
+        self.schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in fields])
+        if file_format == "parquet":
+            self.writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self.writer = pa.ipc.new_file(path, self.schema)
+
+    def write(self, rows):
+        columns = zip(*rows)
+        table = pa.Table.from_arrays([pa.array(column, type=field.type)
+                                      for column, field in zip(columns, self.schema)], schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+
+def open_sink(path, fields, file_format):
+    if file_format == "csv":
+        return CSVSink(path, fields)
+    return ArrowSink(path, fields, file_format)
+
+
+def load_checkpoint(path):
+    """The last export's position: {"results": last row ID, "moves": games exported}."""
+    checkpoint = {"results": 0, "moves": 0}
+    if os.path.exists(path):
+        with open(path) as f:
+            checkpoint.update(json.load(f))
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    # Written to a temporary file and renamed, so a crash leaves the old checkpoint.
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        json.dump(checkpoint, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def export_chunks(chunks, output_dir, name, fields, file_format):
+    """Write an iterable of row lists to one file, a chunk at a time.
+
+    The file is written under a temporary name and renamed to
+    "<name>_<first>-<last><ext>" by the first column of the first and last
+    row once complete. Returns (path, rows, last row) or None if there
+    were no rows.
+    """
+    temp = os.path.join(output_dir, f".{name}.partial")
+    sink = None
+    count = 0
+    first = last = None
+    try:
+        for rows in chunks:
+            if not rows:
+                continue
+            if sink is None:
+                sink = open_sink(temp, fields, file_format)
+                first = rows[0]
+            sink.write(rows)
+            count += len(rows)
+            last = rows[-1]
+    finally:
+        if sink is not None:
+            sink.close()
+    if sink is None:
+        return None
+    path = os.path.join(output_dir, f"{name}_{first[0]}-{last[0]}{FORMATS[file_format]}")
+    os.replace(temp, path)
+    return path, count, last
+
+
+def result_chunks(storage, after, fetch_size=EXPORT_FETCH_SIZE):
+    for rows in storage.iter_results(after, fetch_size):
+        # Dates and times come back as date/timedelta objects from MySQL and as text from SQLite.
+        yield [(row[0],) + tuple(None if value is None else str(value) for value in row[1:]) for row in rows]
+
+
+def move_chunks(log, start, chunk_size=MOVE_CHUNK_SIZE):
+    """Yield lists of MOVE_FIELDS rows, one row per move, for the games from the `start`-th on."""
+    rows = []
+    for game, record in enumerate(log.iter_from(start), start):
+        winner = record.winner or "Draw"
+        for ply, (player, row, col) in enumerate(record.iter_moves()):
+            rows.append((game, record.record_id, record.timestamp, record.mode, record.player1,
+                         record.player2, winner, ply, player, row, col))
+        # Chunks end on a game boundary, so a game's moves are never split between batches.
+        if len(rows) >= chunk_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+def export_results(storage, output_dir, file_format, after=0, fetch_size=EXPORT_FETCH_SIZE):
+    """Export the results with a row ID above `after`; returns the new last row ID."""
+    exported = export_chunks(result_chunks(storage, after, fetch_size), output_dir, "results",
+                             RESULT_FIELDS, file_format)
+    if exported is None:
+        print("No new results")
+        return after
+    path, count, last = exported
+    print(f"Exported {count} results to {path}")
+    return last[0]
+
+
+def export_moves(log_path, output_dir, file_format, start=0, chunk_size=MOVE_CHUNK_SIZE):
+    """Export the moves of the games from the `start`-th on; returns the number of games now exported."""
+    log = MoveLog(log_path)
+    try:
+        exported = export_chunks(move_chunks(log, start, chunk_size), output_dir, "moves",
+                                 MOVE_FIELDS, file_format)
+    finally:
+        log.close()
+    if exported is None:
+        print("No new games")
+        return start
+    path, count, last = exported
+    print(f"Exported {last[0] + 1 - start} games, {count} moves to {path}")
+    return last[0] + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export game results and move logs to columnar files.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--source", choices=("results", "moves", "all"), default="all")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet" if pa is not None else "csv")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only export rows newer than the last checkpoint in the output directory")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_FETCH_SIZE, help="rows read at a time")
+    parser.add_argument("--move-log", help="move log to export (default: the configured move_log_path)")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(args.output_dir, CHECKPOINT_NAME)
+    checkpoint = load_checkpoint(checkpoint_path) if args.incremental else {"results": 0, "moves": 0}
+    config = load_db_config()
+    start = time.perf_counter()
+    if args.source in ("results", "all"):
+        checkpoint["results"] = export_results(get_storage(config), args.output_dir, args.format,
+                                               checkpoint["results"], args.chunk_size)
+        close_storage()
+    if args.source in ("moves", "all"):
+        log_path = args.move_log or config["move_log_path"]
+        if os.path.exists(log_path):
+            checkpoint["moves"] = export_moves(log_path, args.output_dir, args.format,
+                                               checkpoint["moves"], args.chunk_size)
+        else:
+            print(f"No move log at {log_path}")
+    # Every export, full or incremental, leaves a checkpoint the next incremental run starts from.
+    save_checkpoint(checkpoint_path, checkpoint)
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
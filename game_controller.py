@@ -1,12 +1,14 @@
 import pygame
+import random
 import sys
 import datetime
-import random
-from game_model import GameModel, check_game_winner, check_draw, board_to_2d, minimax
+from ai_player import AIPlayer, AIWorker
+from game_model import GameModel
 from game_view import GameView
-from database import create_connection, execute_query
-from question_db import load_geography_questions, get_random_question
-
+from database import load_db_config
+from move_log import RESULT_CODES, MoveLogWriter
+from storage import ResultWriter, close_storage
+from question_db import QuestionSampler, load_geography_questions, parse_tags
 
 class GameController:
     def __init__(self, screen):
@@ -15,80 +17,98 @@ class GameController:
         self.view = GameView(screen, self.model)
         self.clock = pygame.time.Clock()
         self.questions = load_geography_questions()
+        # Works through the bank without repeats; each player's seen questions persist.
+        self.question_sampler = QuestionSampler(self.questions)
+        # An optional tag filter for the questions, from the config file.
+        config = load_db_config()
+        self.model.trivia_tags = parse_tags(config["trivia_tags"])
+        self.model.trivia_exclude_tags = parse_tags(config["trivia_exclude_tags"])
+        # Each player's next trivia question, drawn while the board is shown.
+        self.next_questions = {}
+        self.ai = AIPlayer()
+        # Searches run on a background thread so the loop keeps drawing and handling input.
+        self.ai_worker = AIWorker(self.ai)
+        # Results are written in the background; a slow database never stalls the window.
+        self.result_writer = ResultWriter()
+        self.move_log = self.open_move_log()
         self.model.state = "welcome"
 
     def run(self):
         running = True
         while running:
             self.clock.tick(30)
-            # In single-player mode, if it's AI's turn, perform AI move.
+            # In single-player mode, if it's AI's turn, start or finish the AI move.
             if self.model.ai_enabled and self.model.state == "game" and self.model.current_turn == "O":
                 self.perform_ai_move()
+            if self.model.state == "game" and self.trivia_enabled():
+                self.prefetch_trivia_question()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                     break
                 self.handle_event(event)
             self.view.draw()
+        self.ai_worker.close()
+        self.ai.close()
+        self.result_writer.close()
+        self.question_sampler.close()
+        if self.move_log is not None:
+            self.move_log.close()
+        print(f"Result writer: {self.result_writer.stats()}")
+        close_storage()
         pygame.quit()
         sys.exit()
 
     def log_game_result(self):
-        # Use correct connection parameters.
-        connection = create_connection("localhost", "root", "IdodoBird!1", "tic_tac_toe_db")
-        if connection:
-            player1 = self.model.player1_name
-            player2 = self.model.player2_name
-            if "wins" in self.model.result_message:
-                winner = self.model.result_message.split(" wins!")[0]
-            else:
-                winner = "Draw"
-            mode = self.model.game_mode
-            now = datetime.datetime.now()
-            game_date = now.date()
-            game_time = now.strftime("%H:%M:%S")
-            query = f"""
-            INSERT INTO project_results (player1, player2, winner, mode, game_date, game_time)
-            VALUES ('{player1}', '{player2}', '{winner}', '{mode}', '{game_date}', '{game_time}')
-            """
-            execute_query(connection, query)
-            connection.close()
-            self.model.result_logged = True
+        player1 = self.model.player1_name
+        player2 = self.model.player2_name
+        if "wins" in self.model.result_message:
+            winner = self.model.result_message.split(" wins!")[0]
+        else:
+            winner = "Draw"
+        mode = self.model.game_mode
+        now = datetime.datetime.now()
+        game_date = now.date()
+        game_time = now.strftime("%H:%M:%S")
+        record_id = self.result_writer.submit((player1, player2, winner, mode, str(game_date), game_time))
+        if self.move_log is not None:
+            rules = self.model.rules
+            self.move_log.append(self.model.moves, mode, rules.rows, rules.cols, player1, player2,
+                                 RESULT_CODES[self.model.check_winner()], record_id, now.timestamp())
+        self.model.result_logged = True
 
-    def perform_ai_move(self):
-        board = board_to_2d(self.model.cells, self.model.board_size)
-        difficulty = self.model.ai_difficulty  # "easy", "medium", or "hard"
-        move = None
-        available_moves = [(cell.row, cell.col) for cell in self.model.cells if cell.value is None]
+    def open_move_log(self):
+        # Every finished game's moves are kept in a binary log; see move_log.py.
+        try:
+            return MoveLogWriter(load_db_config()["move_log_path"])
+        except (OSError, ValueError) as e:
+            print(f"The error '{e}' occurred")
+            return None
 
-        # If board is not 3x3 or difficulty is "easy", choose a random move.
-        if self.model.board_size != 3 or difficulty == "easy":
-            if available_moves:
-                move = random.choice(available_moves)
-        elif difficulty == "medium":
-            if random.random() < 0.5:
-                if available_moves:
-                    move = random.choice(available_moves)
-            else:
-                score, move = minimax(board, 0, True, -float("inf"), float("inf"))
-        elif difficulty == "hard":
-            score, move = minimax(board, 0, True, -float("inf"), float("inf"))
+    def perform_ai_move(self):
+        # Ask the worker for a move on the first frame of the AI's turn, then poll for it.
+        if not self.ai_worker.busy:
+            self.ai_worker.request(self.model.board, self.model.game_mode, self.model.ai_difficulty,
+                                   self.model.current_turn, self.model.ai_backend)
+            self.model.ai_thinking = True
+            return
+        try:
+            move = self.ai_worker.poll()
+        except Exception as e:
+            print(f"The error '{e}' occurred")
+            # Play on with a random legal move rather than asking the failing search again.
+            available_moves = self.model.board.empty_cells()
+            move = random.choice(available_moves) if available_moves else None
+        if move is not None or not self.ai_worker.busy:
+            self.model.ai_thinking = False
 
         if move is not None:
             i, j = move
             for cell in self.model.cells:
                 if cell.row == i and cell.col == j:
-                    cell.mark(
-                        self.model.current_turn,
-                        self.model.player2_color
-                    )
-                    self.model.moves.append({
-                        "player": self.model.current_turn,
-                        "row": cell.row,
-                        "col": cell.col
-                    })
+                    self.model.mark_cell(cell, self.model.current_turn, self.model.player2_color)
                     break
-            winner = check_game_winner(self.model.cells, self.model.board_size, self.model.game_mode)
+            winner = self.model.check_winner()
             if winner:
                 self.model.result_message = (
                     f"{self.model.player1_name if winner == 'X' else self.model.player2_name} wins!"
@@ -96,7 +116,7 @@ class GameController:
                 self.model.state = "result"
                 if not self.model.result_logged:
                     self.log_game_result()
-            elif check_draw(self.model.cells):
+            elif self.model.check_draw():
                 self.model.result_message = "It's a draw!"
                 self.model.state = "result"
                 if not self.model.result_logged:
@@ -104,12 +124,40 @@ class GameController:
             else:
                 self.model.current_turn = "X"
 
+    def trivia_enabled(self):
+        # Two-player games on 3x3 ask a trivia question before every move.
+        return not self.model.ai_enabled and self.model.game_mode == "3x3"
+
+    def current_player_name(self):
+        return self.model.player1_name if self.model.current_turn == "X" else self.model.player2_name
+
+    def draw_trivia_question(self, player):
+        # Any question will do when none matches the model's tag filter. It counts as seen
+        # once shown, since a prefetched question may never be.
+        sampler = self.question_sampler
+        return (sampler.draw(player, self.model.trivia_tags, self.model.trivia_exclude_tags, mark=False)
+                or sampler.draw(player, mark=False))
+
+    def prefetch_trivia_question(self):
+        # Draw the player to move's question and have the view render it before they click.
+        player = self.current_player_name()
+        question = self.next_questions.get(player)
+        if question is None:
+            question = self.next_questions[player] = self.draw_trivia_question(player)
+        if question is not self.view.trivia_question:
+            self.view.prepare_trivia(question)
+
+    def cancel_ai_move(self):
+        self.ai_worker.cancel()
+        self.model.ai_thinking = False
+
     def handle_event(self, event):
         state = self.model.state
 
         # Back button handling (applies to all screens except welcome).
         if state != "welcome" and event.type == pygame.MOUSEBUTTONDOWN:
             if self.view.back_button.is_clicked(event.pos):
+                self.cancel_ai_move()
                 if state == "game_type":
                     self.model.state = "welcome"
                 elif state == "difficulty_select":
@@ -164,47 +212,41 @@ class GameController:
                     self.model.player1_name = self.view.player1_box.text.strip() or "Player 1"
                     if self.model.ai_enabled:
                         self.model.player2_name = "ChupChik"
-                        # In single-player, set board mode to 3x3 and start game immediately.
-                        self.model.game_mode = "3x3"
-                        self.model.create_board()
-                        self.model.state = "game"
                     else:
                         self.model.player2_name = self.view.player2_box.text.strip() or "Player 2"
-                        self.model.state = "mode_select"
+                    self.model.state = "mode_select"
 
         elif state == "mode_select":
             if event.type == pygame.MOUSEBUTTONDOWN:
-                if self.view.mode3_button.is_clicked(event.pos):
-                    self.model.game_mode = "3x3"
-                elif self.view.mode4_button.is_clicked(event.pos):
-                    self.model.game_mode = "4x4"
-                elif self.view.mode5_button.is_clicked(event.pos):
-                    self.model.game_mode = "5x5"
+                for btn, mode in self.view.mode_buttons:
+                    if btn.is_clicked(event.pos):
+                        self.model.game_mode = mode
+                        break
                 if self.model.game_mode:
+                    self.cancel_ai_move()
                     self.model.create_board()
                     self.model.state = "game"
 
         elif state == "game":
-            if event.type == pygame.MOUSEBUTTONDOWN:
+            # While the AI is thinking the board belongs to it.
+            if event.type == pygame.MOUSEBUTTONDOWN and not self.model.ai_thinking:
                 for cell in self.model.cells:
                     if cell.rect.collidepoint(event.pos) and cell.value is None:
                         # In two-player mode on 3x3, trigger trivia; otherwise, mark move immediately.
-                        if (not self.model.ai_enabled) and (self.model.game_mode == "3x3"):
-                            question = get_random_question(self.questions)
+                        if self.trivia_enabled():
+                            player = self.current_player_name()
+                            question = self.next_questions.pop(player, None) or self.draw_trivia_question(player)
+                            self.question_sampler.shown(player, question)
                             self.model.pending_move = (cell.row, cell.col)
                             self.model.current_trivia_question = question
                             self.model.state = "trivia"
                         else:
-                            cell.mark(
+                            self.model.mark_cell(
+                                cell,
                                 self.model.current_turn,
                                 self.model.player1_color if self.model.current_turn == "X" else self.model.player2_color
                             )
-                            self.model.moves.append({
-                                "player": self.model.current_turn,
-                                "row": cell.row,
-                                "col": cell.col
-                            })
-                            winner = check_game_winner(self.model.cells, self.model.board_size, self.model.game_mode)
+                            winner = self.model.check_winner()
                             if winner:
                                 self.model.result_message = (
                                     f"{self.model.player1_name if winner == 'X' else self.model.player2_name} wins!"
@@ -212,7 +254,7 @@ class GameController:
                                 self.model.state = "result"
                                 if not self.model.result_logged:
                                     self.log_game_result()
-                            elif check_draw(self.model.cells):
+                            elif self.model.check_draw():
                                 self.model.result_message = "It's a draw!"
                                 self.model.state = "result"
                                 if not self.model.result_logged:
@@ -231,20 +273,16 @@ class GameController:
                             if pending:
                                 for cell in self.model.cells:
                                     if cell.row == pending[0] and cell.col == pending[1]:
-                                        cell.mark(
+                                        self.model.mark_cell(
+                                            cell,
                                             self.model.current_turn,
                                             self.model.player1_color if self.model.current_turn == "X" else self.model.player2_color
                                         )
-                                        self.model.moves.append({
-                                            "player": self.model.current_turn,
-                                            "row": cell.row,
-                                            "col": cell.col
-                                        })
                                         break
                         self.model.current_turn = "O" if self.model.current_turn == "X" else "X"
                         self.model.pending_move = None
                         self.model.current_trivia_question = None
-                        winner = check_game_winner(self.model.cells, self.model.board_size, self.model.game_mode)
+                        winner = self.model.check_winner()
                         if winner:
                             self.model.result_message = (
                                 f"{self.model.player1_name if winner == 'X' else self.model.player2_name} wins!"
@@ -252,7 +290,7 @@ class GameController:
                             self.model.state = "result"
                             if not self.model.result_logged:
                                 self.log_game_result()
-                        elif check_draw(self.model.cells):
+                        elif self.model.check_draw():
                             self.model.result_message = "It's a draw!"
                             self.model.state = "result"
                             if not self.model.result_logged:
@@ -1,5 +1,6 @@
 import pygame
 import textwrap
+from rules import MODES
 from ui_helpers import TextInputBox, Button, BACKGROUND_GRADIENT_START, BACKGROUND_GRADIENT_END, BLACK, FONT, SMALL_FONT
 
 
@@ -28,29 +29,63 @@ class GameView:
         self.player2_box = TextInputBox(200, 210, 200, 40)
         self.name_start_button = Button(250, 280, 100, 50, "Continue")
 
-        # Board mode selection buttons (only for two-player mode).
-        self.mode3_button = Button(100, 250, 120, 50, "3x3")
-        self.mode4_button = Button(240, 250, 120, 50, "4x4")
-        self.mode5_button = Button(380, 250, 120, 50, "5x5")
+        # Board mode selection buttons, one per registered mode, three per row.
+        self.mode_buttons = []
+        for index, mode in enumerate(MODES):
+            row, col = divmod(index, 3)
+            per_row = min(3, len(MODES) - row * 3)
+            x = (600 - (140 * per_row - 20)) // 2 + col * 140
+            self.mode_buttons.append((Button(x, 250 + row * 70, 120, 50, mode), mode))
 
         self.trivia_buttons = []
+        # The question prepare_trivia() last rendered, and its surface and option buttons.
+        self.trivia_question = None
+        self.trivia_surface = None
+        self.trivia_option_buttons = []
+        # Drawn onto the prepared surface; prepare_trivia() runs while the game screen
+        # has moved back_button, so it must not touch that one.
+        self.trivia_back_button = Button(10, 10, 80, 40, "Back")
+        self.background = None
         self.play_again_button = Button(225, 500, 150, 50, "Play Again")
 
     def draw_gradient(self, start_color, end_color):
-        height = self.screen.get_height()
-        for y in range(height):
-            ratio = y / height
-            r = start_color[0] + (end_color[0] - start_color[0]) * ratio
-            g = start_color[1] + (end_color[1] - start_color[1]) * ratio
-            b = start_color[2] + (end_color[2] - start_color[2]) * ratio
-            pygame.draw.line(self.screen, (int(r), int(g), int(b)), (0, y), (self.screen.get_width(), y))
-
-    def draw_wrapped_text(self, text, font, color, x, y, max_width):
+        # The gradient is drawn line by line once and then blitted every frame.
+        if self.background is None or self.background.get_size() != self.screen.get_size():
+            self.background = pygame.Surface(self.screen.get_size())
+            height = self.screen.get_height()
+            for y in range(height):
+                ratio = y / height
+                r = start_color[0] + (end_color[0] - start_color[0]) * ratio
+                g = start_color[1] + (end_color[1] - start_color[1]) * ratio
+                b = start_color[2] + (end_color[2] - start_color[2]) * ratio
+                pygame.draw.line(self.background, (int(r), int(g), int(b)), (0, y), (self.screen.get_width(), y))
+        self.screen.blit(self.background, (0, 0))
+
+    def draw_wrapped_text(self, text, font, color, x, y, max_width, surface=None):
         """Draw text with wrapping if it exceeds max_width."""
+        surface = surface if surface is not None else self.screen
         lines = textwrap.wrap(text, width=40)
         for i, line in enumerate(lines):
             text_surface = font.render(line, True, color)
-            self.screen.blit(text_surface, (x, y + i * text_surface.get_height()))
+            surface.blit(text_surface, (x, y + i * text_surface.get_height()))
+
+    def prepare_trivia(self, question):
+        """Render a trivia question, its option buttons and the Back button onto one transparent surface.
+
+        The controller calls this for the next question while the board is
+        shown, so the trivia screen is a single blit.
+        """
+        surface = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+        self.draw_wrapped_text(question["question"], SMALL_FONT, BLACK, 50, 50, self.screen.get_width() - 100, surface)
+        buttons = []
+        for idx, option in enumerate(question["options"]):
+            btn = Button(100, 250 + idx * 60, 400, 50, option)
+            btn.draw(surface)
+            buttons.append((btn, idx))
+        self.trivia_back_button.draw(surface)
+        self.trivia_question = question
+        self.trivia_surface = surface
+        self.trivia_option_buttons = buttons
 
     def draw(self):
         self.draw_gradient(BACKGROUND_GRADIENT_START, BACKGROUND_GRADIENT_END)
@@ -94,34 +129,35 @@ class GameView:
             title = FONT.render("Select Board Mode", True, BLACK)
             title_rect = title.get_rect(center=(300, 150))
             self.screen.blit(title, title_rect)
-            self.mode3_button.draw(self.screen)
-            self.mode4_button.draw(self.screen)
-            self.mode5_button.draw(self.screen)
+            for btn, mode in self.mode_buttons:
+                btn.draw(self.screen)
 
         elif state == "game":
             self.model.cells.draw(self.screen)
             info_text = f"{self.model.player1_name} (X) vs {self.model.player2_name} (O)  Turn: {self.model.current_turn}"
             info = SMALL_FONT.render(info_text, True, BLACK)
             self.screen.blit(info, (20, 20))
+            if self.model.ai_thinking:
+                # Cycle the dots so a long search visibly keeps going.
+                dots = "." * (pygame.time.get_ticks() // 400 % 3 + 1)
+                thinking = SMALL_FONT.render(f"{self.model.player2_name} is thinking{dots}", True, BLACK)
+                self.screen.blit(thinking, (20, 45))
             # When inside a game, reposition the back button to the bottom left.
             self.back_button.rect.topleft = (10, 550)
             self.back_button.draw(self.screen)
 
         elif state == "trivia":
-            self.trivia_buttons = []
-            if self.model.current_trivia_question:
-                q = self.model.current_trivia_question
-                self.draw_wrapped_text(q["question"], SMALL_FONT, BLACK, 50, 50, self.screen.get_width() - 100)
-                options = q["options"]
-                x = 100
-                y = 250
-                for idx, option in enumerate(options):
-                    btn = Button(x, y + idx * 60, 400, 50, option)
-                    btn.draw(self.screen)
-                    self.trivia_buttons.append((btn, idx))
             # Use default back button position for trivia.
             self.back_button.rect.topleft = (10, 10)
-            self.back_button.draw(self.screen)
+            question = self.model.current_trivia_question
+            if question:
+                if question is not self.trivia_question:
+                    self.prepare_trivia(question)
+                self.trivia_buttons = self.trivia_option_buttons
+                self.screen.blit(self.trivia_surface, (0, 0))
+            else:
+                self.trivia_buttons = []
+                self.back_button.draw(self.screen)
 
         elif state == "result":
             big_font = pygame.font.SysFont("Arial", 60)
@@ -0,0 +1,179 @@
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import BitBoard
+from evaluation import candidate_moves, opponent_of, winning_cells
+from rules import MODES, get_rules
+
+EXPLORATION = math.sqrt(2)
+
+
+class Node:
+    __slots__ = ("move", "parent", "player", "untried", "children", "visits", "wins")
+
+    def __init__(self, move, parent, player, untried):
+        self.move = move
+        self.parent = parent
+        self.player = player  # The player who made `move`.
+        self.untried = untried
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0  # From `player`'s point of view; draws count half.
+
+    def best_child(self):
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits),
+        )
+
+
+class MCTSResult:
+    def __init__(self, move, visits, playouts, elapsed, workers):
+        self.move = move
+        self.visits = visits  # {move: visits} summed over all workers' root nodes.
+        self.playouts = playouts
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def playouts_per_second(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+
+def root_moves(board, player, mode):
+    # Take a win at once; if the opponent threatens one, only blocks are worth sampling.
+    wins = winning_cells(board, player, mode)
+    if wins:
+        return wins[:1]
+    return winning_cells(board, opponent_of(player), mode) or candidate_moves(board)
+
+
+def run_tree(grid, mode, player, iterations, budget_ms, seed, cancel=None):
+    """Grow one UCT tree from `grid` with `player` to move.
+
+    Stops after `iterations` playouts or `budget_ms` milliseconds, whichever
+    comes first (either may be None), or once the `cancel` event is set.
+    Returns ({move: visits}, playouts).
+    """
+    rng = random.Random(seed)
+    board = BitBoard.from_2d(grid)
+    root = Node(None, None, opponent_of(player), root_moves(board, player, mode))
+    deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+    playouts = 0
+    while iterations is None or playouts < iterations:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if cancel is not None and cancel.is_set():
+            break
+        node = root
+        placed = []
+        winner = None
+        # Selection.
+        while not node.untried and node.children:
+            node = node.best_child()
+            board.place(node.move[0], node.move[1], node.player)
+            placed.append((node.move, node.player))
+            if board.has_won(node.player, mode):
+                winner = node.player
+        # Expansion.
+        if winner is None and node.untried:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            mover = opponent_of(node.player)
+            board.place(move[0], move[1], mover)
+            placed.append((move, mover))
+            if board.has_won(mover, mode):
+                winner = mover
+                untried = []
+            else:
+                untried = board.empty_cells()
+            child = Node(move, node, mover, untried)
+            node.children.append(child)
+            node = child
+        # Random playout.
+        if winner is None:
+            mover = opponent_of(node.player)
+            moves = board.empty_cells()
+            rng.shuffle(moves)
+            for move in moves:
+                board.place(move[0], move[1], mover)
+                placed.append((move, mover))
+                if board.has_won(mover, mode):
+                    winner = mover
+                    break
+                mover = opponent_of(mover)
+        # Backpropagation.
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1
+            elif winner is None:
+                node.wins += 0.5
+            node = node.parent
+        for move, mover in reversed(placed):
+            board.remove(move[0], move[1], mover)
+        playouts += 1
+    return {child.move: child.visits for child in root.children}, playouts
+
+
+def mcts_search(board, mode, player="O", iterations=None, budget_ms=None, workers=1, executor=None, seed=None,
+                cancel=None):
+    """Pick `player`'s move by root-parallel UCT.
+
+    Each worker grows an independent tree for its share of `iterations` (or
+    for the whole `budget_ms`); root visit counts are summed and the most
+    visited move wins. With workers > 1 the trees run in `executor` or a
+    temporary process pool. A single tree runs in this thread and stops
+    early when the `cancel` event is set; pooled trees cannot see the event
+    and run out their budget.
+    """
+    if iterations is None and budget_ms is None:
+        raise ValueError("mcts_search needs an iteration count or a time budget")
+    grid = board.to_2d()
+    seed = random.randrange(1 << 30) if seed is None else seed
+    share = None if iterations is None else max(1, iterations // workers)
+    start = time.perf_counter()
+    if workers == 1:
+        results = [run_tree(grid, mode, player, share, budget_ms, seed, cancel)]
+    else:
+        args = [(grid, mode, player, share, budget_ms, seed + i) for i in range(workers)]
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run_tree, *zip(*args)))
+        else:
+            results = list(executor.map(run_tree, *zip(*args)))
+    elapsed = time.perf_counter() - start
+
+    visits = {}
+    playouts = 0
+    for tree_visits, tree_playouts in results:
+        playouts += tree_playouts
+        for move, count in tree_visits.items():
+            visits[move] = visits.get(move, 0) + count
+    move = max(visits, key=visits.get) if visits else None
+    return MCTSResult(move, visits, playouts, elapsed, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure MCTS playout throughput from an empty board.")
+    parser.add_argument("--mode", default="5x5", choices=sorted(MODES))
+    parser.add_argument("--budget-ms", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+    rules = get_rules(args.mode)
+    board = BitBoard(rules.rows, rules.cols)
+    for workers in args.workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Start the worker processes before timing.
+            list(pool.map(abs, range(workers)))
+            result = mcts_search(board, args.mode, "X", budget_ms=args.budget_ms, workers=workers,
+                                 executor=pool if workers > 1 else None, seed=0)
+        print(f"{workers} worker(s): {result.playouts} playouts in {result.elapsed:.2f}s "
+              f"= {result.playouts_per_second:.0f}/s, move {result.move}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+
+# File layout: HEADER, then one record per game, appended in play order.
+# A record is RECORD (its first field counts the bytes after it), the
+# length-prefixed UTF-8 mode, player1 and player2 names, one cell number
+# (row * cols + col) per move - one byte, or two on boards of more than
+# 256 cells - and, when the FLAG_PLAYERS bit is set, a bitmap of who made
+# each move (bit set = "O"). Without it, moves alternate starting with "X".
+# The companion "<path>.idx" file holds each record's offset as a uint64,
+# for random access.
+MAGIC = b"TTTM"
+VERSION = 1
+HEADER = struct.Struct("<4sB3x")
+RECORD = struct.Struct("<I16sIBBBBH")  # size, record_id, unix time, rows, cols, result, flags, move count
+SIZE_FIELD = struct.Struct("<I")
+
+RESULT_DRAW, RESULT_X, RESULT_O, RESULT_UNFINISHED = 0, 1, 2, 3
+RESULT_CODES = {None: RESULT_DRAW, "X": RESULT_X, "O": RESULT_O}
+FLAG_PLAYERS = 1
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def encode_text(text):
+    # Cut to 255 bytes on a character boundary, so the text still decodes.
+    data = text.encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")
+    return bytes((len(data),)) + data
+
+
+def encode_game(moves, mode, rows, cols, player1, player2, result, record_id=None, timestamp=None):
+    """Encode one game; `moves` is GameModel.moves ({"player", "row", "col"} dicts) or (player, row, col) tuples."""
+    moves = [(move["player"], move["row"], move["col"]) if isinstance(move, dict) else tuple(move)
+             for move in moves]
+    cells = [row * cols + col for _, row, col in moves]
+    body = bytearray()
+    body += encode_text(mode) + encode_text(player1) + encode_text(player2)
+    body += bytes(cells) if rows * cols <= 256 else array("H", cells).tobytes()
+    flags = 0
+    if any(player != "XO"[i % 2] for i, (player, _, _) in enumerate(moves)):
+        flags |= FLAG_PLAYERS
+        bitmap = bytearray((len(moves) + 7) // 8)
+        for i, (player, _, _) in enumerate(moves):
+            if player == "O":
+                bitmap[i // 8] |= 1 << (i % 8)
+        body += bitmap
+    record_id = bytes.fromhex(record_id) if isinstance(record_id, str) else (record_id or bytes(16))
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    header = RECORD.pack(RECORD.size - SIZE_FIELD.size + len(body), record_id, timestamp,
+                         rows, cols, result, flags, len(moves))
+    return header + bytes(body)
+
+
+class GameRecord:
+    """One decoded game. Moves stay as raw cell numbers until iterated."""
+
+    __slots__ = ("record_id", "timestamp", "mode", "rows", "cols", "player1", "player2", "result",
+                 "cells", "players")
+
+    def __init__(self, buffer, offset):
+        size, record_id, self.timestamp, self.rows, self.cols, self.result, flags, count = \
+            RECORD.unpack_from(buffer, offset)
+        self.record_id = record_id.hex()
+        position = offset + RECORD.size
+        texts = []
+        for _ in range(3):
+            length = buffer[position]
+            texts.append(bytes(buffer[position + 1:position + 1 + length]).decode("utf-8"))
+            position += 1 + length
+        self.mode, self.player1, self.player2 = texts
+        width = 1 if self.rows * self.cols <= 256 else 2
+        raw = bytes(buffer[position:position + count * width])
+        self.cells = raw if width == 1 else array("H", raw)
+        position += count * width
+        self.players = bytes(buffer[position:position + (count + 7) // 8]) if flags & FLAG_PLAYERS else None
+
+    @property
+    def winner(self):
+        return {RESULT_X: "X", RESULT_O: "O"}.get(self.result)
+
+    def player_of(self, i):
+        if self.players is None:
+            return "XO"[i % 2]
+        return "O" if self.players[i // 8] >> (i % 8) & 1 else "X"
+
+    def iter_moves(self):
+        """Yield (player, row, col) for every move in order."""
+        for i, cell in enumerate(self.cells):
+            row, col = divmod(cell, self.cols)
+            yield self.player_of(i), row, col
+
+    def to_dicts(self):
+        # The GameModel.moves form.
+        return [{"player": player, "row": row, "col": col} for player, row, col in self.iter_moves()]
+
+
+def scan_records(buffer, start, end):
+    """Yield the offset of every complete record in buffer[start:end]."""
+    offset = start
+    while offset + SIZE_FIELD.size <= end:
+        size = SIZE_FIELD.unpack_from(buffer, offset)[0]
+        if size < RECORD.size - SIZE_FIELD.size or offset + SIZE_FIELD.size + size > end:
+            return
+        yield offset
+        offset += SIZE_FIELD.size + size
+
+
+def recover(path):
+    """Make the data and index files consistent after a crash; returns the number of records.
+
+    Drops a torn record at the end of the data file, trims a partial index
+    entry and indexes any complete records the index is missing.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION))
+        with open(index_path(path), "wb"):
+            pass
+        return 0
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        data.close()
+        raise ValueError(f"{path} is not a version {VERSION} move log")
+    offsets = array("Q")
+    if os.path.exists(index_path(path)):
+        with open(index_path(path), "rb") as f:
+            raw = f.read()
+        offsets.frombytes(raw[:len(raw) - len(raw) % offsets.itemsize])
+    while offsets and offsets[-1] >= len(data):
+        offsets.pop()
+    start = HEADER.size
+    if offsets:
+        start = offsets.pop()  # Re-check the last indexed record too.
+    end = start
+    # Only the tail past the last indexed record is read.
+    for offset in scan_records(data, start, len(data)):
+        offsets.append(offset)
+        end = offset + SIZE_FIELD.size + SIZE_FIELD.unpack_from(data, offset)[0]
+    size = len(data)
+    data.close()
+    if end < size:
+        with open(path, "r+b") as f:
+            f.truncate(end)
+    with open(index_path(path), "wb") as f:
+        offsets.tofile(f)
+    return len(offsets)
+
+
+class MoveLogWriter:
+    """Appends games to a move log; recovers the files on open."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = recover(path)
+        self.data = open(path, "ab")
+        self.index = open(index_path(path), "ab")
+
+    def append(self, moves, mode, rows, cols, player1, player2, result, record_id=None, timestamp=None):
+        record = encode_game(moves, mode, rows, cols, player1, player2, result, record_id, timestamp)
+        offset = self.data.tell()
+        self.data.write(record)
+        self.data.flush()
+        # The index entry goes last, so it never points past the data.
+        self.index.write(struct.pack("<Q", offset))
+        self.index.flush()
+        self.count += 1
+        return offset
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class MoveLog:
+    """Read-only, memory-mapped view of a move log.
+
+    Iterating scans the records in order without the index; indexing
+    (log[i]) looks the offset up in the index file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {VERSION} move log")
+        self.offsets = array("Q")
+        with open(index_path(path), "rb") as f:
+            raw = f.read()
+        self.offsets.frombytes(raw[:len(raw) - len(raw) % self.offsets.itemsize])
+        while self.offsets and self.offsets[-1] >= len(self._mmap):
+            self.offsets.pop()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        return GameRecord(self._mmap, self.offsets[i])
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """Yield the records from the `start`-th on, scanning from its indexed offset."""
+        offset = self.offsets[start] if start < len(self.offsets) else len(self._mmap)
+        for offset in scan_records(self._mmap, offset if start else HEADER.size, len(self._mmap)):
+            yield GameRecord(self._mmap, offset)
+
+    def close(self):
+        self._mmap.close()
+
+
+def random_game(rng, rows, cols):
+    cells = [(row, col) for row in range(rows) for col in range(cols)]
+    rng.shuffle(cells)
+    count = rng.randrange(rows + cols, rows * cols + 1)
+    return [("XO"[i % 2], row, col) for i, (row, col) in enumerate(cells[:count])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write, scan and measure a binary move log.")
+    parser.add_argument("path")
+    parser.add_argument("--games", type=int, default=1_000_000, help="random 3x3..5x5 games to append first")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    sizes = [(3, 3), (4, 4), (5, 5)]
+    games = [random_game(rng, *rng.choice(sizes)) for _ in range(min(args.games, 10_000))]
+    writer = MoveLogWriter(args.path)
+    start = time.perf_counter()
+    for i in range(args.games):
+        moves = games[i % len(games)]
+        size = max(row for _, row, _ in moves) + 1
+        writer.append(moves, f"{size}x{size}", size, size, "Player 1", "ChupChik", RESULT_O)
+    writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"appended {args.games} games in {elapsed:.2f}s ({args.games / elapsed:,.0f} games/s)")
+
+    log = MoveLog(args.path)
+    start = time.perf_counter()
+    moves = sum(len(record.cells) for record in log)
+    elapsed = time.perf_counter() - start
+    print(f"scanned {len(log)} games, {moves} moves in {elapsed:.2f}s ({len(log) / elapsed:,.0f} games/s)")
+    start = time.perf_counter()
+    for i in rng.sample(range(len(log)), min(100_000, len(log))):
+        log[i].to_dicts()
+    elapsed = time.perf_counter() - start
+    print(f"random access: {elapsed / min(100_000, len(log)) * 1e6:.1f} us/game")
+
+    data_bytes = os.path.getsize(args.path) + os.path.getsize(index_path(args.path))
+    sample = log[len(log) - 1]
+    json_bytes = len(json.dumps({"mode": sample.mode, "player1": sample.player1, "player2": sample.player2,
+                                 "moves": sample.to_dicts()}))
+    dict_bytes = sys.getsizeof(sample.to_dicts()) + sum(sys.getsizeof(move) for move in sample.to_dicts())
+    print(f"{data_bytes / len(log):.1f} bytes/game on disk with index; the last game is "
+          f"{os.path.getsize(args.path) - log.offsets[-1]} bytes here, {json_bytes} as JSON, "
+          f"{dict_bytes} as GameModel.moves dicts")
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from bitboard import BitBoard
+from evaluation import candidate_moves, evaluate_position, winning_cells
+from rules import MODES, get_rules
+from search import WIN_SCORE, Search, SearchTimeout
+
+NO_ALPHA = -2 * WIN_SCORE
+
+# Seconds between checks of the cancel event while waiting on the workers.
+CANCEL_POLL_INTERVAL = 0.02
+
+# Set in each worker process by init_worker.
+_shared_alpha = None
+_stop = None
+
+
+def init_worker(shared_alpha, stop):
+    global _shared_alpha, _stop
+    _shared_alpha = shared_alpha
+    _stop = stop
+
+
+def root_moves(board, mode):
+    """Root moves for "O" in a fixed order: wins, forced blocks, then by static score."""
+    wins = winning_cells(board, "O", mode)
+    if wins:
+        return wins[:1]
+    blocks = winning_cells(board, "X", mode)
+    if blocks:
+        return blocks
+
+    def static_score(move):
+        board.place(move[0], move[1], "O")
+        score = evaluate_position(board, mode, False)
+        board.remove(move[0], move[1], "O")
+        return score
+
+    # sorted() is stable, so equal scores keep row-major order.
+    return sorted(candidate_moves(board), key=static_score, reverse=True)
+
+
+def search_root_move(grid, mode, move, max_depth, deadline, shared_alpha, cancel=None):
+    """Score one root move; returns (score, nodes), or (None, nodes) on timeout or cancel."""
+    if cancel is not None and cancel.is_set():
+        return None, 0
+    if deadline is not None and time.perf_counter() >= deadline:
+        return None, 0
+    board = BitBoard.from_2d(grid)
+    board.place(move[0], move[1], "O")
+    search = Search(mode, max_depth=max_depth, deadline=deadline, shared_alpha=shared_alpha, cancel=cancel)
+    try:
+        score, _ = search.minimax(board, 1, False, NO_ALPHA, float("inf"))
+    except SearchTimeout:
+        return None, search.nodes
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+    return score, search.nodes
+
+
+def worker_search_root_move(grid, mode, move, max_depth, deadline):
+    return search_root_move(grid, mode, move, max_depth, deadline, _shared_alpha, _stop)
+
+
+class ParallelSearch:
+    """Root-split alpha-beta over a process pool.
+
+    The first (eldest) root move is searched in this process to establish a
+    bound; the remaining moves then run on the workers, which publish every
+    finished score through a shared alpha that the others re-read as they
+    search. Workers search without a transposition table and keep ties
+    exact, so the chosen move - the earliest root move with the best score -
+    does not depend on scheduling.
+
+    A threading.Event cannot reach the worker processes, so a `cancel` event
+    is relayed to them through `stop`, a multiprocessing.Event. It is also
+    set when the deadline passes: the search then returns at once, and the
+    next one waits for the abandoned workers before resetting the alpha.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.shared_alpha = multiprocessing.Value("l", NO_ALPHA)
+        self.stop = multiprocessing.Event()
+        self.running = []  # The last search's worker futures.
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                            initargs=(self.shared_alpha, self.stop))
+
+    def search(self, board, mode, max_depth=None, deadline=None, cancel=None, first_move=None):
+        """Return (score, move, nodes) for "O"; raises SearchTimeout if `deadline` passes or `cancel` is set.
+
+        `first_move`, if a root move, is searched first, in this process.
+        """
+        moves = root_moves(board, mode)
+        if first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+        grid = board.to_2d()
+        # Workers left running by a timed-out search stop at their next clock check.
+        wait(self.running)
+        with self.shared_alpha.get_lock():
+            self.shared_alpha.value = NO_ALPHA
+        self.stop.clear()
+        first_score, nodes = search_root_move(grid, mode, moves[0], max_depth, deadline, self.shared_alpha, cancel)
+        if first_score is None:
+            raise SearchTimeout()
+        scores = [first_score]
+        futures = self.running = [self.executor.submit(worker_search_root_move, grid, mode, move, max_depth,
+                                                       deadline) for move in moves[1:]]
+        pending = futures
+        while pending:
+            if (cancel is not None and cancel.is_set()) or \
+                    (deadline is not None and time.perf_counter() >= deadline):
+                self.stop.set()
+                for future in pending:
+                    future.cancel()
+                raise SearchTimeout()
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            if cancel is not None:
+                timeout = CANCEL_POLL_INTERVAL if timeout is None else min(timeout, CANCEL_POLL_INTERVAL)
+            _, pending = wait(pending, timeout=timeout)
+        for future in futures:
+            score, worker_nodes = future.result()
+            nodes += worker_nodes
+            scores.append(score)
+        if None in scores:
+            raise SearchTimeout()
+        best = max(scores)
+        return best, moves[scores.index(best)], nodes
+
+    def iterative_deepening(self, board, mode, budget_ms, cancel=None):
+        """Deepen one ply at a time until `budget_ms` runs out or `cancel` is set; returns (score, move, depth).
+
+        The result is that of the last depth to complete, whose best move is searched first at the next.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        best_score, best_move, best_depth = 0, root_moves(board, mode)[0], 0
+        for depth_limit in range(1, board.empty_count + 1):
+            if cancel is not None and cancel.is_set():
+                break
+            try:
+                score, move, _ = self.search(board, mode, depth_limit, deadline, cancel, best_move)
+            except SearchTimeout:
+                break
+            best_score, best_move, best_depth = score, move, depth_limit
+            if abs(best_score) > WIN_SCORE // 2:
+                break
+        return best_score, best_move, best_depth
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def benchmark_position(mode):
+    # A fixed early-midgame position per mode, "O" to move.
+    rules = get_rules(mode)
+    board = BitBoard(rules.rows, rules.cols)
+    center_r, center_c = rules.rows // 2, rules.cols // 2
+    for (row, col), player in (((center_r, center_c), "X"), ((0, 0), "O"), ((center_r, center_c - 1), "X")):
+        board.place(row, col, player)
+    return board
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare root-split parallel search with serial minimax.")
+    parser.add_argument("--mode", default="4x4", choices=sorted(MODES))
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    board = benchmark_position(args.mode)
+
+    search = Search(args.mode, max_depth=args.depth)
+    start = time.perf_counter()
+    serial_score, serial_move = search.minimax(board.copy(), 0, True, -float("inf"), float("inf"))
+    serial_time = time.perf_counter() - start
+    print(f"serial: score {serial_score}, move {serial_move}, {search.nodes} nodes, {serial_time:.2f}s")
+
+    for workers in args.workers:
+        parallel = ParallelSearch(workers)
+        # Start the worker processes before timing.
+        list(parallel.executor.map(abs, range(workers)))
+        start = time.perf_counter()
+        score, move, nodes = parallel.search(board, args.mode, args.depth)
+        elapsed = time.perf_counter() - start
+        parallel.close()
+        print(f"{workers} worker(s): score {score}, move {move}, {nodes} nodes, {elapsed:.2f}s, "
+              f"speedup {serial_time / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+import argparse
+import bisect
+import json
+import math
+import mmap
+import os
+import random
+import struct
+import time
+from array import array
+
+# File layout: HEADER, then seven sections, each starting on an 8-byte boundary:
+#   questions       one QUESTION record per question, in bank order
+#   options         uint32 string IDs; a question's options are a contiguous run
+#   tags            uint32 string IDs; likewise a contiguous run per question
+#   tag directory   one TAG_ENTRY per distinct tag, sorted by tag text
+#   postings        uint32 question indexes, ascending, one run per tag
+#   string offsets  uint64 start of every string in the string data, plus its end
+#   string data     UTF-8 text, back to back
+# Option and tag texts repeat across questions and are stored once; question
+# texts are nearly always unique and are not deduplicated, so compiling a
+# bank only keeps the distinct options and tags in memory.
+MAGIC = b"TTQB"
+VERSION = 2
+HEADER = struct.Struct("<4sB3xIII4x7Q")  # magic, version, questions, strings, tags, seven section offsets
+QUESTION = struct.Struct("<IIIBBH")  # text string ID, first option, first tag, option count, answer, tag count
+TAG_ENTRY = struct.Struct("<III")  # tag string ID, first posting, posting count
+COPY_BLOCK = 1 << 20
+# Random picks sample_matching() tries before scanning the candidates.
+SAMPLE_TRIES = 32
+# Most candidates one sample_matching() scan looks at.
+SCAN_LIMIT = 4096
+
+
+def align(offset):
+    return (offset + 7) & ~7
+
+
+class BankWriter:
+    """Compiles questions into a bank file, one add() at a time.
+
+    Question records and string IDs are kept as packed arrays and string
+    data is spooled to a temporary file, so memory grows by a few bytes per
+    question. close() assembles the bank and renames it into place.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.questions = array("I")  # text ID, first option, first tag, option count, answer, tag count
+        self.options = array("I")
+        self.tags = array("I")
+        self.postings = {}  # tag string ID -> indexes of the questions with the tag
+        self.string_offsets = array("Q", [0])
+        self.option_ids = {}
+        self.strings = open(path + ".strings.tmp", "w+b")
+
+    def __len__(self):
+        return len(self.questions) // 6
+
+    def add_string(self, text):
+        self.strings.write(text.encode("utf-8"))
+        self.string_offsets.append(self.strings.tell())
+        return len(self.string_offsets) - 2
+
+    def add_option(self, text):
+        string_id = self.option_ids.get(text)
+        if string_id is None:
+            string_id = self.option_ids[text] = self.add_string(text)
+        return string_id
+
+    def add(self, question):
+        """Add one {"question", "options", "answer", optional "tags"} dict, the geography_questions.json form."""
+        options = question["options"]
+        answer = question["answer"]
+        tags = sorted(set(question.get("tags", ())))
+        if not 0 <= answer < len(options) <= 255:
+            raise ValueError(f"Bad question {question['question']!r}: answer {answer} of {len(options)} options")
+        index = len(self)
+        self.questions.extend((self.add_string(question["question"]), len(self.options), len(self.tags),
+                               len(options), answer, len(tags)))
+        self.options.extend(self.add_option(option) for option in options)
+        for tag in tags:
+            tag_id = self.add_option(tag)
+            self.tags.append(tag_id)
+            postings = self.postings.get(tag_id)
+            if postings is None:
+                postings = self.postings[tag_id] = array("I")
+            postings.append(index)
+
+    def close(self):
+        count = len(self)
+        tag_ids = sorted(self.postings, key={tag_id: text for text, tag_id in self.option_ids.items()}.get)
+        questions_offset = align(HEADER.size)
+        options_offset = align(questions_offset + count * QUESTION.size)
+        tags_offset = align(options_offset + len(self.options) * self.options.itemsize)
+        directory_offset = align(tags_offset + len(self.tags) * self.tags.itemsize)
+        postings_offset = align(directory_offset + len(tag_ids) * TAG_ENTRY.size)
+        string_offsets_offset = align(postings_offset + len(self.tags) * self.tags.itemsize)
+        strings_offset = string_offsets_offset + len(self.string_offsets) * self.string_offsets.itemsize
+        temp = self.path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, count, len(self.string_offsets) - 1, len(tag_ids),
+                                questions_offset, options_offset, tags_offset, directory_offset,
+                                postings_offset, string_offsets_offset, strings_offset))
+            f.write(bytes(questions_offset - f.tell()))
+            for i in range(0, len(self.questions), 6):
+                f.write(QUESTION.pack(*self.questions[i:i + 6]))
+            f.write(bytes(options_offset - f.tell()))
+            self.options.tofile(f)
+            f.write(bytes(tags_offset - f.tell()))
+            self.tags.tofile(f)
+            f.write(bytes(directory_offset - f.tell()))
+            first = 0
+            for tag_id in tag_ids:
+                f.write(TAG_ENTRY.pack(tag_id, first, len(self.postings[tag_id])))
+                first += len(self.postings[tag_id])
+            f.write(bytes(postings_offset - f.tell()))
+            for tag_id in tag_ids:
+                self.postings[tag_id].tofile(f)
+            f.write(bytes(string_offsets_offset - f.tell()))
+            self.string_offsets.tofile(f)
+            self.strings.seek(0)
+            while True:
+                block = self.strings.read(COPY_BLOCK)
+                if not block:
+                    break
+                f.write(block)
+        self.strings.close()
+        os.remove(self.strings.name)
+        os.replace(temp, self.path)
+        return count
+
+
+def write_bank(questions, path):
+    """Compile an iterable of question dicts into a bank at `path`; returns the number written."""
+    writer = BankWriter(path)
+    try:
+        for question in questions:
+            writer.add(question)
+    except BaseException:
+        writer.strings.close()
+        os.remove(writer.strings.name)
+        raise
+    return writer.close()
+
+
+class QuestionBank:
+    """Read-only, memory-mapped question bank.
+
+    Opening reads only the header; bank[i] decodes question i into the
+    {"question", "options", "answer", "tags"} dict the game uses, so it can
+    stand in for the list from geography_questions.json. postings(tag)
+    binary-searches the tag directory in place.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Older versions have a shorter header; check the magic and version before the rest.
+        if len(self._mmap) < HEADER.size or self._mmap[:5] != MAGIC + bytes((VERSION,)):
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {VERSION} question bank")
+        (_, _, self.count, self.string_count, self.tag_count, self.questions_offset, options_offset, tags_offset,
+         self.directory_offset, postings_offset, string_offsets_offset, self.strings_offset) = \
+            HEADER.unpack_from(self._mmap, 0)
+        view = memoryview(self._mmap)
+        self.options = view[options_offset:tags_offset].cast("I")
+        self.tags = view[tags_offset:self.directory_offset].cast("I")
+        self.all_postings = view[postings_offset:string_offsets_offset].cast("I")
+        self.string_offsets = view[string_offsets_offset:self.strings_offset].cast("Q")
+        self.looked_up = {}  # tag -> postings, for the tags asked for so far
+
+    def __len__(self):
+        return self.count
+
+    def string(self, i):
+        start = self.strings_offset + self.string_offsets[i]
+        end = self.strings_offset + self.string_offsets[i + 1]
+        return self._mmap[start:end].decode("utf-8")
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("question index out of range")
+        text, first, first_tag, option_count, answer, tag_count = \
+            QUESTION.unpack_from(self._mmap, self.questions_offset + i * QUESTION.size)
+        return {
+            "question": self.string(text),
+            "options": [self.string(self.options[j]) for j in range(first, first + option_count)],
+            "answer": answer,
+            "tags": [self.string(self.tags[j]) for j in range(first_tag, first_tag + tag_count)],
+        }
+
+    def tag(self, entry):
+        return TAG_ENTRY.unpack_from(self._mmap, self.directory_offset + entry * TAG_ENTRY.size)
+
+    def postings(self, tag):
+        """The ascending indexes of the questions tagged `tag`, as a uint32 view (empty if none)."""
+        postings = self.looked_up.get(tag)
+        if postings is None:
+            postings = self.looked_up[tag] = self.find_postings(tag)
+        return postings
+
+    def find_postings(self, tag):
+        low, high = 0, self.tag_count
+        while low < high:
+            middle = (low + high) // 2
+            string_id, first, count = self.tag(middle)
+            text = self.string(string_id)
+            if text == tag:
+                return self.all_postings[first:first + count]
+            if text < tag:
+                low = middle + 1
+            else:
+                high = middle
+        return self.all_postings[0:0]
+
+    def tag_postings(self, tag):
+        # The sample_matching() interface: (first question index, postings) per bank.
+        return [(0, self.postings(tag))]
+
+    def tag_names(self):
+        return [self.string(self.tag(entry)[0]) for entry in range(self.tag_count)]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def close(self):
+        for view in list(self.looked_up.values()) + [self.options, self.tags, self.all_postings, self.string_offsets]:
+            view.release()
+        self._mmap.close()
+
+
+class BankSet:
+    """Several banks read as one, numbered in the order given.
+
+    Each bank carries its own tag index, so adding a question file only
+    compiles that file; the index over the set is the banks' postings with
+    each bank's first question index added.
+    """
+
+    def __init__(self, banks):
+        self.banks = list(banks)
+        self.starts = []
+        count = 0
+        for bank in self.banks:
+            self.starts.append(count)
+            count += len(bank)
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("question index out of range")
+        b = bisect.bisect_right(self.starts, i) - 1
+        return self.banks[b][i - self.starts[b]]
+
+    def __iter__(self):
+        for bank in self.banks:
+            yield from bank
+
+    def tag_postings(self, tag):
+        return [(start, bank.postings(tag)) for start, bank in zip(self.starts, self.banks)]
+
+    def tag_names(self):
+        return sorted({tag for bank in self.banks for tag in bank.tag_names()})
+
+    def close(self):
+        for bank in self.banks:
+            bank.close()
+
+
+def has_index(postings, i):
+    # Whether question i is in a tag_postings() list; each run is sorted, so one bisect per bank.
+    for start, run in postings:
+        j = bisect.bisect_left(run, i - start)
+        if j < len(run) and run[j] == i - start:
+            return True
+    return False
+
+
+def tag_filter(questions, tags, exclude):
+    """The candidates for a tag filter - the shortest postings list among `tags`, or every
+    question - and a function telling whether a candidate has the other tags and none of `exclude`."""
+    include = sorted((questions.tag_postings(tag) for tag in tags),
+                     key=lambda postings: sum(len(run) for _, run in postings))
+    excluded = [questions.tag_postings(tag) for tag in exclude]
+    candidates = include[0] if include else [(0, range(len(questions)))]
+    others = include[1:]
+
+    def matches(i):
+        return all(has_index(postings, i) for postings in others) and \
+            not any(has_index(postings, i) for postings in excluded)
+
+    return candidates, matches
+
+
+def matching_indices(questions, tags=(), exclude=()):
+    """Every index matching the filter in ascending order, by a full scan of the candidates."""
+    candidates, matches = tag_filter(questions, tags, exclude)
+    return array("I", (start + j for start, run in candidates for j in run if matches(start + j)))
+
+
+def sample_matching(questions, tags=(), exclude=(), rng=random, accept=None, scan=True):
+    """A random index of a question tagged with all of `tags` and none of `exclude`, or None.
+
+    Picks uniformly from the shortest postings list among `tags` (all
+    questions if there are none) and checks the other tags by binary
+    search, so a draw costs O(log n) when most candidates match. After
+    SAMPLE_TRIES misses it scans up to SCAN_LIMIT candidates spread over
+    the list instead; beyond that many, a filter matching very few of them
+    may be missed. `accept(i)` can reject matches, e.g. seen questions; if
+    it rejects all of those scanned, any match is returned. With
+    scan=False, None is returned once the random picks are used up.
+    """
+    candidates, matches = tag_filter(questions, tags, exclude)
+    total = sum(len(run) for _, run in candidates)
+    if not total:
+        return None
+
+    def candidate(k):
+        for start, run in candidates:
+            if k < len(run):
+                return start + run[k]
+            k -= len(run)
+
+    for _ in range(SAMPLE_TRIES):
+        i = candidate(rng.randrange(total))
+        if matches(i) and (accept is None or accept(i)):
+            return i
+    if not scan:
+        return None
+    # Step by a random stride coprime to the count, so a capped scan covers the whole
+    # list rather than one run of neighbouring (and similarly tagged) questions.
+    stride = 1
+    if total > SCAN_LIMIT:
+        stride = rng.randrange(1, total)
+        while math.gcd(stride, total) != 1:
+            stride = rng.randrange(1, total)
+    k = rng.randrange(total)
+    found = []
+    for _ in range(min(total, SCAN_LIMIT)):
+        i = candidate(k)
+        if matches(i):
+            found.append(i)
+        k = (k + stride) % total
+    if accept is not None:
+        found = [i for i in found if accept(i)] or found
+    return rng.choice(found) if found else None
+
+
+def convert(json_path, bank_path):
+    """Compile a geography_questions.json-style file into a bank; returns the number of questions."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    return write_bank(questions, bank_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and inspect binary question banks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_bank = commands.add_parser("convert", help="compile a JSON question file into a bank")
+    compile_bank.add_argument("json_path")
+    compile_bank.add_argument("bank_path")
+    show = commands.add_parser("show", help="time opening a bank and print questions from it")
+    show.add_argument("bank_path")
+    show.add_argument("index", type=int, nargs="*")
+    sample = commands.add_parser("sample", help="draw questions by tag from one or more banks")
+    sample.add_argument("bank_path", nargs="+")
+    sample.add_argument("--tag", action="append", default=[], help="required tag, e.g. region:europe")
+    sample.add_argument("--exclude", action="append", default=[], help="tag the question must not have")
+    sample.add_argument("--count", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        start = time.perf_counter()
+        count = convert(args.json_path, args.bank_path)
+        print(f"Compiled {count} questions into {args.bank_path} ({os.path.getsize(args.bank_path):,} bytes) "
+              f"in {time.perf_counter() - start:.2f}s")
+    elif args.command == "show":
+        start = time.perf_counter()
+        bank = QuestionBank(args.bank_path)
+        elapsed = time.perf_counter() - start
+        print(f"Opened {len(bank)} questions in {elapsed * 1e3:.2f} ms")
+        for i in args.index:
+            print(json.dumps(bank[i], ensure_ascii=False))
+        bank.close()
+    elif args.command == "sample":
+        bank = BankSet(QuestionBank(path) for path in args.bank_path)
+        start = time.perf_counter()
+        picks = [sample_matching(bank, args.tag, args.exclude) for _ in range(args.count)]
+        elapsed = time.perf_counter() - start
+        for i in picks[:10]:
+            print("no match" if i is None else json.dumps(bank[i], ensure_ascii=False))
+        print(f"{args.count} draws in {elapsed * 1e3:.2f} ms ({elapsed / args.count * 1e6:.1f} us/draw)")
+        bank.close()
+
+
+if __name__ == "__main__":
+    main()
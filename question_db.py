@@ -1,11 +1,46 @@
-import json
+import hashlib
+import os
 import random
+import struct
+from collections import deque
+from question_bank import BankSet, QuestionBank, convert, has_index, matching_indices, sample_matching
+
+QUESTIONS_PATH = "geography_questions.json"
+# Further question files. Each is compiled and tag-indexed into its own bank,
+# so adding one leaves the existing banks as they are.
+QUESTIONS_DIR = "questions"
+
+def question_files():
+    # Files are numbered in this order, which seen-histories depend on: name new files to sort last.
+    paths = [QUESTIONS_PATH] if os.path.exists(QUESTIONS_PATH) else []
+    if os.path.isdir(QUESTIONS_DIR):
+        paths += sorted(os.path.join(QUESTIONS_DIR, name) for name in os.listdir(QUESTIONS_DIR)
+                        if name.endswith(".json"))
+    return paths
+
+def bank_path(path):
+    return os.path.splitext(path)[0] + ".qbank"
+
+def open_bank(path):
+    """The compiled bank of a JSON question file, (re)compiled when missing or older than the file."""
+    compiled = bank_path(path)
+    if not os.path.exists(compiled) or os.path.getmtime(compiled) < os.path.getmtime(path):
+        convert(path, compiled)
+    try:
+        return QuestionBank(compiled)
+    except ValueError:
+        # Compiled by an older version of question_bank.py.
+        convert(path, compiled)
+        return QuestionBank(compiled)
 
 def load_geography_questions():
+    """All question files' banks as one, memory-mapped; questions are only decoded when drawn."""
     try:
-        with open("geography_questions.json", "r", encoding="utf-8") as f:
-            questions = json.load(f)
-        return questions
+        paths = question_files()
+        if not paths:
+            raise FileNotFoundError(f"no {QUESTIONS_PATH} or {QUESTIONS_DIR}/*.json")
+        banks = [open_bank(path) for path in paths]
+        return banks[0] if len(banks) == 1 else BankSet(banks)
     except Exception as e:
         print("Error loading geography questions:", e)
         # Fallback sample questions:
@@ -24,3 +59,253 @@ def load_geography_questions():
 
 def get_random_question(questions):
     return random.choice(questions)
+
+# A question whose fact was among this many recently drawn facts is passed over.
+REPEAT_WINDOW = 10
+# Redraws before accepting a recently used fact anyway, when the bank has too few others.
+MAX_REDRAWS = 8
+# One seen-questions bitset per player lives here, across sessions.
+HISTORY_DIR = "question_history"
+HISTORY_MAGIC = b"TTQH"
+HISTORY_HEADER = struct.Struct("<4sI")  # magic, questions covered
+
+def question_fact(question):
+    # Paraphrases of one question share a "fact:" tag. Untagged ones share their correct answer,
+    # e.g. "What is the capital of France?" and "Name the capital city of France." both answer "Paris".
+    for tag in question.get("tags", ()):
+        if tag.startswith("fact:"):
+            return tag
+    return question["options"][question["answer"]]
+
+def parse_tags(text):
+    # "region:europe, difficulty:easy" -> ("region:europe", "difficulty:easy")
+    return tuple(tag.strip() for tag in text.split(",") if tag.strip())
+
+class QuestionHistory:
+    """Which questions each player has seen, as a bitset per player.
+
+    A player's bitset is loaded on first use from "<directory>/<hash of
+    name>.bits" and written back by save(). Indexes are bank positions: a
+    bank that grew keeps the history, a smaller one resets it.
+    """
+
+    def __init__(self, directory=HISTORY_DIR, count=0):
+        self.directory = directory
+        self.count = count
+        self.bits = {}
+        self.dirty = set()
+
+    def path(self, player):
+        return os.path.join(self.directory, hashlib.sha1(player.encode("utf-8")).hexdigest()[:20] + ".bits")
+
+    def get(self, player):
+        bits = self.bits.get(player)
+        if bits is None:
+            bits = bytearray((self.count + 7) // 8)
+            try:
+                with open(self.path(player), "rb") as f:
+                    data = f.read()
+                magic, count = HISTORY_HEADER.unpack_from(data)
+                if magic == HISTORY_MAGIC and count <= self.count:
+                    saved = data[HISTORY_HEADER.size:HISTORY_HEADER.size + (count + 7) // 8]
+                    bits[:len(saved)] = saved
+            except FileNotFoundError:
+                pass
+            except (OSError, struct.error) as e:
+                print(f"The error '{e}' occurred")
+            self.bits[player] = bits
+        return bits
+
+    def seen(self, player, i):
+        return self.get(player)[i >> 3] >> (i & 7) & 1
+
+    def mark(self, player, i):
+        self.get(player)[i >> 3] |= 1 << (i & 7)
+        self.dirty.add(player)
+
+    def reset(self, player):
+        self.bits[player] = bytearray((self.count + 7) // 8)
+        self.dirty.add(player)
+
+    def forget(self, player, indexes):
+        bits = self.get(player)
+        for i in indexes:
+            bits[i >> 3] &= ~(1 << (i & 7))
+        self.dirty.add(player)
+
+    def save(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for player in self.dirty:
+                path = self.path(player)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(HISTORY_HEADER.pack(HISTORY_MAGIC, self.count) + self.bits[player])
+                os.replace(path + ".tmp", path)
+            self.dirty.clear()
+        except OSError as e:
+            print(f"The error '{e}' occurred")
+
+class ShuffleBag:
+    """The numbers 0..count-1 in random order, shuffled lazily.
+
+    A Fisher-Yates shuffle that only records the positions it has swapped,
+    so a new bag costs nothing and taking a number is O(1).
+    """
+
+    def __init__(self, count, rng):
+        self.remaining = count
+        self.moved = {}
+        self.rng = rng
+
+    def __len__(self):
+        return self.remaining
+
+    def pick(self):
+        """A random position in the bag and the number at it, left in the bag."""
+        j = self.rng.randrange(self.remaining)
+        return j, self.moved.get(j, j)
+
+    def take(self, j):
+        """Remove the number at position `j`, moving the last one into its place."""
+        self.remaining -= 1
+        last = self.moved.pop(self.remaining, self.remaining)
+        if j != self.remaining:
+            self.moved[j] = last
+
+class QuestionSampler:
+    """Draws questions without replacement from a shuffle bag per player.
+
+    Each player's bag holds every question; one the player has already seen
+    is dropped when drawn, and a player who has seen them all starts over.
+    A question whose fact_key() is among the last `window` facts drawn for
+    the same player is put back and another drawn.
+    """
+
+    def __init__(self, questions, history=None, window=REPEAT_WINDOW, fact_key=question_fact, rng=random):
+        self.questions = questions
+        self.history = history if history is not None else QuestionHistory(count=len(questions))
+        self.fact_key = fact_key
+        self.rng = rng
+        self.window = window
+        self.recent = {}
+        self.bags = {}
+        self.matches = {}  # (tags, exclude) -> every matching index, for the filters used so far
+        self.unshown = {}  # player -> (question, index) drawn with mark=False and not yet shown
+
+    def bag(self, player):
+        bag = self.bags.get(player)
+        if not bag:
+            if int.from_bytes(self.history.get(player), "little").bit_count() >= len(self.questions):
+                self.history.reset(player)
+            bag = self.bags[player] = ShuffleBag(len(self.questions), self.rng)
+        return bag
+
+    def recent_facts(self, player):
+        # The player's last `window` facts, or None when repeats are not held back.
+        if not self.window:
+            return None
+        recent = self.recent.get(player)
+        if recent is None:
+            recent = self.recent[player] = deque(maxlen=self.window)
+        return recent
+
+    def draw(self, player="", tags=(), exclude=(), mark=True):
+        """Draw the next question for `player` and record it in their history; None if there are none.
+
+        With `tags` or `exclude`, the question is one tagged with all of
+        `tags` and none of `exclude`, found through the bank's tag index and
+        unseen by the player if possible; None if no question matches.
+        With mark=False, e.g. for a question drawn ahead of time, it is only
+        recorded once shown() is called for it.
+        """
+        if len(self.questions) == 0:
+            return None
+        if tags or exclude:
+            return self.draw_matching(player, tags, exclude, mark)
+        recent = self.recent_facts(player)
+        redraws = 0
+        while True:
+            bag = self.bag(player)
+            j, i = bag.pick()
+            if self.history.seen(player, i):
+                # Seen in an earlier session or through a filtered draw.
+                bag.take(j)
+                continue
+            question = self.questions[i]
+            fact = self.fact_key(question)
+            redraws += 1
+            if recent is None or fact not in recent or redraws >= MAX_REDRAWS:
+                break
+        bag.take(j)
+        self.record(player, i, question, mark)
+        if recent is not None:
+            recent.append(fact)
+        return question
+
+    def draw_matching(self, player, tags, exclude, mark=True):
+        recent = self.recent_facts(player)
+
+        def unseen(i):
+            return not self.history.seen(player, i)
+
+        if hasattr(self.questions, "tag_postings"):
+            # Recent "fact:" tags are checked in the tag index; only other fact keys need the question decoded.
+            held_back = [self.questions.tag_postings(fact) for fact in recent or () if fact.startswith("fact:")]
+            other_facts = [fact for fact in recent or () if not fact.startswith("fact:")]
+
+            def fresh(i):
+                if not unseen(i) or any(has_index(postings, i) for postings in held_back):
+                    return False
+                return not other_facts or self.fact_key(self.questions[i]) not in other_facts
+
+            # Like draw(), give up on avoiding recent facts after a few picks rather than scan for one.
+            i = sample_matching(self.questions, tags, exclude, self.rng, fresh, scan=False)
+            if i is None:
+                i = sample_matching(self.questions, tags, exclude, self.rng, unseen)
+            if i is None or not unseen(i):
+                # The capped scan found no unseen match; check every match before giving up on them.
+                found = self.filter_matches(tags, exclude)
+                left = [j for j in found if unseen(j)]
+                if left:
+                    i = self.rng.choice(left)
+                elif found:
+                    # The player has seen every match: forget just those and go round again.
+                    self.history.forget(player, found)
+                    i = self.rng.choice(found)
+                else:
+                    i = None
+        else:
+            # The fallback list has no index.
+            found = [i for i, question in enumerate(self.questions)
+                     if set(tags) <= set(question.get("tags", ())) and not set(exclude) & set(question.get("tags", ()))]
+            i = self.rng.choice(found) if found else None
+        if i is None:
+            return None
+        question = self.questions[i]
+        self.record(player, i, question, mark)
+        if recent is not None:
+            recent.append(self.fact_key(question))
+        return question
+
+    def record(self, player, i, question, mark):
+        if mark:
+            self.history.mark(player, i)
+        else:
+            self.unshown[player] = (question, i)
+
+    def shown(self, player, question):
+        """Record `question`, drawn for `player` with mark=False, in their history now they have seen it."""
+        held = self.unshown.pop(player, None)
+        if held is not None and held[0] is question:
+            self.history.mark(player, held[1])
+
+    def filter_matches(self, tags, exclude):
+        # The bank does not change, so each filter's matches are found once.
+        key = (tuple(tags), tuple(exclude))
+        found = self.matches.get(key)
+        if found is None:
+            found = self.matches[key] = matching_indices(self.questions, tags, exclude)
+        return found
+
+    def close(self):
+        self.history.save()
@@ -0,0 +1,235 @@
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from question_bank import BankWriter
+
+# The built-in fact set: 50 (country, capital, region, difficulty) facts.
+COUNTRY_CAPITALS = [
+    ("France", "Paris", "Europe", "easy"),
+    ("United Kingdom", "London", "Europe", "easy"),
+    ("Japan", "Tokyo", "Asia", "easy"),
+    ("Canada", "Ottawa", "North America", "hard"),
+    ("Egypt", "Cairo", "Africa", "easy"),
+    ("Germany", "Berlin", "Europe", "easy"),
+    ("Brazil", "Brasília", "South America", "hard"),
+    ("Russia", "Moscow", "Europe", "easy"),
+    ("Australia", "Canberra", "Oceania", "hard"),
+    ("India", "New Delhi", "Asia", "medium"),
+    ("Italy", "Rome", "Europe", "easy"),
+    ("Spain", "Madrid", "Europe", "easy"),
+    ("Mexico", "Mexico City", "North America", "easy"),
+    ("South Korea", "Seoul", "Asia", "medium"),
+    ("Netherlands", "Amsterdam", "Europe", "medium"),
+    ("Sweden", "Stockholm", "Europe", "medium"),
+    ("Norway", "Oslo", "Europe", "medium"),
+    ("Switzerland", "Bern", "Europe", "hard"),
+    ("Belgium", "Brussels", "Europe", "medium"),
+    ("Austria", "Vienna", "Europe", "medium"),
+    ("Portugal", "Lisbon", "Europe", "medium"),
+    ("Greece", "Athens", "Europe", "easy"),
+    ("Turkey", "Ankara", "Asia", "hard"),
+    ("Poland", "Warsaw", "Europe", "medium"),
+    ("Denmark", "Copenhagen", "Europe", "medium"),
+    ("Finland", "Helsinki", "Europe", "medium"),
+    ("Argentina", "Buenos Aires", "South America", "medium"),
+    ("Chile", "Santiago", "South America", "medium"),
+    ("Colombia", "Bogotá", "South America", "medium"),
+    ("Peru", "Lima", "South America", "medium"),
+    ("Nigeria", "Abuja", "Africa", "hard"),
+    ("Kenya", "Nairobi", "Africa", "medium"),
+    ("South Africa", "Pretoria", "Africa", "hard"),
+    ("New Zealand", "Wellington", "Oceania", "hard"),
+    ("Indonesia", "Jakarta", "Asia", "medium"),
+    ("Iran", "Tehran", "Asia", "medium"),
+    ("Iraq", "Baghdad", "Asia", "medium"),
+    ("Saudi Arabia", "Riyadh", "Asia", "medium"),
+    ("Israel", "Jerusalem", "Asia", "medium"),
+    ("Lebanon", "Beirut", "Asia", "medium"),
+    ("Pakistan", "Islamabad", "Asia", "hard"),
+    ("Bangladesh", "Dhaka", "Asia", "hard"),
+    ("Vietnam", "Hanoi", "Asia", "medium"),
+    ("Malaysia", "Kuala Lumpur", "Asia", "medium"),
+    ("Singapore", "Singapore", "Asia", "easy"),
+    ("Ukraine", "Kyiv", "Europe", "medium"),
+    ("Czech Republic", "Prague", "Europe", "medium"),
+    ("Hungary", "Budapest", "Europe", "medium"),
+    ("Romania", "Bucharest", "Europe", "medium"),
+    ("Bulgaria", "Sofia", "Europe", "hard"),
+]
+
+# 10 variations for asking the capital question.
+TEMPLATES = [
+    "What is the capital of {country}?",
+    "Which city is the capital of {country}?",
+    "Name the capital city of {country}.",
+    "What city serves as the capital of {country}?",
+    "Identify the capital of {country}.",
+    "What is the administrative center of {country}?",
+    "Provide the capital city of {country}.",
+    "What is the seat of government in {country}?",
+    "State the capital of {country}.",
+    "Which city serves as the administrative capital of {country}?",
+]
+
+TOPIC = "capitals"
+DISTRACTORS = 3
+# Facts per task handed to a worker process.
+SHARD_SIZE = 2000
+# Shards queued per worker process; bounds the generated questions held in memory.
+SHARDS_AHEAD = 2
+
+_pool = None
+
+
+def load_facts(path):
+    """(country, capital, region, difficulty) facts from a CSV file; the last two columns are optional."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [tuple(row[:4]) + ("",) * (4 - len(row[:4])) for row in csv.reader(f) if len(row) >= 2]
+
+
+def make_tag(key, value):
+    return f"{key}:{value.strip().lower().replace(' ', '-')}"
+
+
+def fact_tags(country, region, difficulty):
+    """The tags shared by every question about one fact; "fact:" ties paraphrases together."""
+    tags = [make_tag("topic", TOPIC), make_tag("fact", f"capital-of-{country}")]
+    if region:
+        tags.append(make_tag("region", region))
+    if difficulty:
+        tags.append(make_tag("difficulty", difficulty))
+    return tags
+
+
+def answer_pool(facts):
+    """The distinct capitals, and each fact's position among them."""
+    pool = sorted({fact[1] for fact in facts})
+    positions = {capital: i for i, capital in enumerate(pool)}
+    return pool, [positions[fact[1]] for fact in facts]
+
+
+def fact_questions(fact, answer, pool, seed, variants):
+    """All questions for one fact: every template, `variants` times with fresh distractors.
+
+    The generator is seeded from (seed, fact index), so a fact's questions
+    do not depend on how the facts are sharded.
+    """
+    index, (country, capital, region, difficulty) = fact
+    rng = random.Random(f"{seed}:{index}")
+    tags = fact_tags(country, region, difficulty)
+    questions = []
+    for _ in range(variants):
+        for template in TEMPLATES:
+            # Sample from the pool minus the correct capital: positions past it shift up by one.
+            picks = rng.sample(range(len(pool) - 1), DISTRACTORS)
+            options = [pool[i + (i >= answer)] for i in picks]
+            correct = rng.randrange(DISTRACTORS + 1)
+            options.insert(correct, capital)
+            questions.append({"question": template.format(country=country), "options": options,
+                              "answer": correct, "tags": tags})
+    return questions
+
+
+def set_pool(pool):
+    # Process initializer: the answer pool is sent to each worker once, not with every shard.
+    global _pool
+    _pool = pool
+
+
+def generate_shard(task):
+    start, facts, answers, seed, variants = task
+    questions = []
+    for offset, (fact, answer) in enumerate(zip(facts, answers)):
+        questions.extend(fact_questions((start + offset, fact), answer, _pool, seed, variants))
+    return questions
+
+
+def shards(facts, answers, seed, variants, shard_size):
+    for start in range(0, len(facts), shard_size):
+        yield (start, facts[start:start + shard_size], answers[start:start + shard_size], seed, variants)
+
+
+def generate_ordered(executor, tasks, ahead):
+    """Like executor.map, but with at most `ahead` tasks submitted and not yet consumed."""
+    futures = deque()
+    for task in tasks:
+        futures.append(executor.submit(generate_shard, task))
+        if len(futures) >= ahead:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
+class JSONWriter:
+    """Streams questions into a JSON array, the geography_questions.json format."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path + ".tmp", "w", encoding="utf-8")
+        self.count = 0
+
+    def add(self, question):
+        self.file.write(",\n" if self.count else "[\n")
+        self.file.write(json.dumps(question, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        self.file.write("\n]\n" if self.count else "[]\n")
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+        return self.count
+
+
+def generate(path, facts, seed=0, variants=1, processes=1, shard_size=SHARD_SIZE):
+    """Write every question for `facts` to `path`, a bank or (for a .json path) a JSON file.
+
+    Shards of facts are generated on `processes` worker processes and
+    written in fact order, so the output is the same for any process
+    count. Returns the question count.
+    """
+    if len(facts) <= DISTRACTORS:
+        raise ValueError(f"Need more than {DISTRACTORS} facts to pick distractors from")
+    pool, answers = answer_pool(facts)
+    if len(pool) <= DISTRACTORS:
+        raise ValueError(f"Need more than {DISTRACTORS} distinct answers to pick distractors from")
+    writer = JSONWriter(path) if path.endswith(".json") else BankWriter(path)
+    tasks = shards(facts, answers, seed, variants, shard_size)
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes, initializer=set_pool, initargs=(pool,)) as executor:
+            for questions in generate_ordered(executor, tasks, processes * SHARDS_AHEAD):
+                for question in questions:
+                    writer.add(question)
+    else:
+        set_pool(pool)
+        for questions in map(generate_shard, tasks):
+            for question in questions:
+                writer.add(question)
+    return writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a geography question bank.")
+    parser.add_argument("output", help="bank file to write, or a .json file for the JSON format")
+    parser.add_argument("--facts", help="CSV of country,capital[,region[,difficulty]] rows "
+                                        "(default: the built-in 50)")
+    parser.add_argument("--variants", type=int, default=1, help="questions per fact and template")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="facts per worker task")
+    args = parser.parse_args()
+
+    facts = load_facts(args.facts) if args.facts else COUNTRY_CAPITALS
+    start = time.perf_counter()
+    count = generate(args.output, facts, args.seed, args.variants, args.processes, args.shard_size)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {count} questions into {args.output} in {elapsed:.2f}s "
+          f"({count / elapsed if elapsed else 0:,.0f} questions/s)")
+
+
+if __name__ == "__main__":
+    main()
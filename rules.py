@@ -0,0 +1,86 @@
+MAX_DIMENSION = 25
+
+# Window area the board is laid out in (see GameView).
+BOARD_AREA_WIDTH = 600
+BOARD_AREA_TOP = 70
+BOARD_AREA_HEIGHT = 460
+
+
+def parse_win_spec(spec):
+    """Compile a win rule such as "5 | 2*4 | 3*3" into ((length, needed), ...).
+
+    Alternatives are separated by "|". "L" means one run of exactly L marks,
+    "N*L" means N runs of exactly L marks each.
+    """
+    conditions = []
+    for term in spec.split("|"):
+        term = term.strip()
+        needed, _, length = term.rpartition("*")
+        try:
+            length = int(length)
+            needed = int(needed) if needed else 1
+        except ValueError:
+            raise ValueError(f"Bad win rule term {term!r} in {spec!r}") from None
+        if length < 1 or needed < 1:
+            raise ValueError(f"Bad win rule term {term!r} in {spec!r}")
+        conditions.append((length, needed))
+    return tuple(conditions)
+
+
+class GameRules:
+    """One board mode: dimensions, compiled win conditions and screen layout.
+
+    Everything that depends on the mode - the model's board, the cell sprites
+    and every AI - reads it from here, so a new mode only needs registering:
+
+        register_mode(GameRules("7x7", 7, 7, "4 | 2*3"))
+    """
+
+    def __init__(self, name, rows, cols, spec, cell_size=None, origin=None):
+        if not (1 <= rows <= MAX_DIMENSION and 1 <= cols <= MAX_DIMENSION):
+            raise ValueError(f"Board {rows}x{cols} is outside 1..{MAX_DIMENSION}")
+        self.name = name
+        self.rows = rows
+        self.cols = cols
+        self.spec = spec
+        self.conditions = parse_win_spec(spec)
+        if max(length for length, _ in self.conditions) > max(rows, cols):
+            raise ValueError(f"Win rule {spec!r} cannot be met on a {rows}x{cols} board")
+        if cell_size is None:
+            cell_size = min(100, BOARD_AREA_HEIGHT // max(rows, cols))
+        if origin is None:
+            origin = ((BOARD_AREA_WIDTH - cols * cell_size) // 2,
+                      BOARD_AREA_TOP + (BOARD_AREA_HEIGHT - rows * cell_size) // 2)
+        self.cell_size = cell_size
+        self.origin = origin
+
+    @property
+    def cells(self):
+        return self.rows * self.cols
+
+
+MODES = {}
+
+
+def register_mode(rules):
+    MODES[rules.name] = rules
+    return rules
+
+
+register_mode(GameRules("3x3", 3, 3, "3", cell_size=100, origin=(150, 100)))
+register_mode(GameRules("4x4", 4, 4, "4 | 2*3", cell_size=80, origin=(100, 80)))
+register_mode(GameRules("5x5", 5, 5, "5 | 2*4 | 3*3", cell_size=70, origin=(80, 70)))
+
+
+def get_rules(mode):
+    """Look up a mode by name; GameRules instances are passed through."""
+    if isinstance(mode, GameRules):
+        return mode
+    return MODES[mode]
+
+
+def win_conditions(mode):
+    if isinstance(mode, GameRules):
+        return mode.conditions
+    rules = MODES.get(mode)
+    return rules.conditions if rules is not None else ()
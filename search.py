@@ -0,0 +1,231 @@
+import time
+from evaluation import candidate_moves, evaluate_position, winning_cells
+from transposition import EXACT, LOWER, UPPER
+
+# Wins score WIN_SCORE minus the ply they happen at, so faster wins score higher.
+WIN_SCORE = 10000
+MATE_THRESHOLD = WIN_SCORE // 2
+
+# How many nodes to search between clock checks; a node takes tens of microseconds,
+# so this keeps a search within about a millisecond of its deadline.
+TIME_CHECK_INTERVAL = 8
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def score_to_table(score, depth):
+    # Table entries store win/loss scores relative to the node, not the root.
+    if score > MATE_THRESHOLD:
+        return score + depth
+    if score < -MATE_THRESHOLD:
+        return score - depth
+    return score
+
+
+def score_from_table(score, depth):
+    if score > MATE_THRESHOLD:
+        return score - depth
+    if score < -MATE_THRESHOLD:
+        return score + depth
+    return score
+
+
+def evaluate_board(board, mode="3x3"):
+    return board.winner(mode)
+
+
+class Search:
+    """Alpha-beta search over a BitBoard; "O" is the maximizing player.
+
+    `max_depth` limits the search horizon (None searches to the end of the
+    game) and `deadline`, a time.perf_counter() value, aborts the search with
+    SearchTimeout. `first_move` is tried first at the root. Killer moves and
+    history scores are kept on the instance, so reusing one Search across
+    iterative-deepening iterations carries them forward.
+
+    `cancel` is a threading.Event checked with the clock; setting it from
+    another thread aborts the search with SearchTimeout as well.
+
+    `shared_alpha` is for root-split workers that search one root move from
+    depth 1 without a table: a multiprocessing.Value holding the best root
+    score found so far by any worker, re-read before every move at depth 1.
+    """
+
+    def __init__(self, mode, table=None, max_depth=None, deadline=None, first_move=None, shared_alpha=None,
+                 cancel=None):
+        self.mode = mode
+        self.table = table
+        self.max_depth = max_depth
+        self.deadline = deadline
+        self.cancel = cancel
+        self.first_move = first_move
+        self.shared_alpha = shared_alpha
+        self.nodes = 0
+        self.killers = {}
+        self.history = {}
+
+    def evaluate(self, board, is_maximizing):
+        # Value of a position at the search horizon.
+        return evaluate_position(board, self.mode, is_maximizing)
+
+    def order_moves(self, board, moves, depth, player, preferred):
+        # Preferred (table/previous iteration) move, then killers, then history score.
+        killers = self.killers.get(depth, ())
+        history = self.history
+
+        def rank(move):
+            if move == preferred:
+                priority = 2
+            elif move in killers:
+                priority = 1
+            else:
+                priority = 0
+            return priority, history.get((player, move), 0)
+
+        moves.sort(key=rank, reverse=True)
+        return moves
+
+    def record_cutoff(self, move, depth, player, remaining):
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        key = (player, move)
+        self.history[key] = self.history.get(key, 0) + remaining * remaining
+
+    def minimax(self, board, depth, is_maximizing, alpha, beta):
+        # Moves are made and undone in place on `board`.
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+            if self.cancel is not None and self.cancel.is_set():
+                raise SearchTimeout()
+
+        winner = evaluate_board(board, self.mode)
+        if winner == "O":
+            return WIN_SCORE - depth, None
+        elif winner == "X":
+            return depth - WIN_SCORE, None
+        elif board.is_full():
+            return 0, None
+
+        remaining = board.empty_count
+        if self.max_depth is not None:
+            if depth >= self.max_depth:
+                return self.evaluate(board, is_maximizing), None
+            remaining = min(remaining, self.max_depth - depth)
+
+        player = "O" if is_maximizing else "X"
+        opponent = "X" if is_maximizing else "O"
+        # Winning now is always best; if the opponent threatens to win,
+        # every move except a block loses at once.
+        wins = winning_cells(board, player, self.mode)
+        if wins:
+            if is_maximizing:
+                return WIN_SCORE - depth - 1, wins[0]
+            return depth + 1 - WIN_SCORE, wins[0]
+        moves = winning_cells(board, opponent, self.mode) or candidate_moves(board)
+
+        preferred = self.first_move if depth == 0 else None
+        table = self.table
+        if table is not None:
+            key, symmetry = board.canonical_key(is_maximizing)
+            entry = table.probe(key)
+            if entry is not None:
+                table_move = board.from_canonical(entry[4], symmetry)
+                # Shallower results only help move ordering.
+                if entry[1] >= remaining:
+                    value = score_from_table(entry[2], depth)
+                    flag = entry[3]
+                    if flag == EXACT:
+                        return value, table_move
+                    elif flag == LOWER:
+                        alpha = max(alpha, value)
+                    elif flag == UPPER:
+                        beta = min(beta, value)
+                    if beta <= alpha:
+                        return value, table_move
+                if preferred is None:
+                    preferred = table_move
+            alpha_orig, beta_orig = alpha, beta
+        if len(moves) > 1:
+            self.order_moves(board, moves, depth, player, preferred)
+
+        if is_maximizing:
+            best_score = -float("inf")
+            best_move = None
+            for i, j in moves:
+                board.place(i, j, "O")
+                score, _ = self.minimax(board, depth + 1, False, alpha, beta)
+                board.remove(i, j, "O")
+                if score > best_score:
+                    best_score = score
+                    best_move = (i, j)
+                alpha = max(alpha, score)
+                if beta <= alpha:
+                    self.record_cutoff((i, j), depth, player, remaining)
+                    break
+        else:
+            best_score = float("inf")
+            best_move = None
+            for i, j in moves:
+                if depth == 1 and self.shared_alpha is not None:
+                    # Stay one below the best root score so ties still come back exact.
+                    alpha = max(alpha, self.shared_alpha.value - 1)
+                board.place(i, j, "X")
+                score, _ = self.minimax(board, depth + 1, True, alpha, beta)
+                board.remove(i, j, "X")
+                if score < best_score:
+                    best_score = score
+                    best_move = (i, j)
+                beta = min(beta, score)
+                if beta <= alpha:
+                    self.record_cutoff((i, j), depth, player, remaining)
+                    break
+
+        if table is not None:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            table.store(key, remaining, score_to_table(best_score, depth), flag,
+                        board.to_canonical(best_move, symmetry))
+        return best_score, best_move
+
+
+def minimax(board, depth, is_maximizing, alpha, beta, mode="3x3", table=None):
+    return Search(mode, table).minimax(board, depth, is_maximizing, alpha, beta)
+
+
+def iterative_deepening(board, mode, budget_ms, table=None, max_depth=None, cancel=None):
+    """Search "O"'s best move one ply deeper at a time until `budget_ms` runs out.
+
+    Returns (score, move, depth) from the last completed iteration. The move
+    found at each depth is searched first at the next one. If not even depth 1
+    completes, the first empty cell is returned with depth 0. Setting the
+    `cancel` event stops the search like an expired budget.
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    moves = candidate_moves(board)
+    best_score, best_move, best_depth = 0, (moves[0] if moves else None), 0
+    limit = board.empty_count if max_depth is None else min(max_depth, board.empty_count)
+    search = Search(mode, table, deadline=deadline, cancel=cancel)
+    for depth_limit in range(1, limit + 1):
+        search.max_depth = depth_limit
+        search.first_move = best_move
+        try:
+            # Work on a copy: a timeout leaves the searched board mid-move.
+            score, move = search.minimax(board.copy(), 0, True, -float("inf"), float("inf"))
+        except SearchTimeout:
+            break
+        if move is not None:
+            best_score, best_move, best_depth = score, move, depth_limit
+        # A forced win or loss will not change with more depth.
+        if abs(best_score) > MATE_THRESHOLD:
+            break
+    return best_score, best_move, best_depth
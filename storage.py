@@ -0,0 +1,686 @@
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from uuid import uuid4
+from database import DB_ERRORS, close_pool, get_pool, load_db_config
+
+RESULT_COLUMNS = ("record_id", "player1", "player2", "winner", "mode", "game_date", "game_time")
+
+# Rows per executemany transaction when bulk loading.
+BULK_BATCH_SIZE = 5000
+# Raw rows fetched at a time while rebuilding the aggregates.
+REBUILD_FETCH_SIZE = 10000
+# Raw rows fetched at a time by iter_results().
+EXPORT_FETCH_SIZE = 10000
+
+# Per-player counters, in player_stats column order after (player, mode).
+STAT_COLUMNS = ("wins", "losses", "draws", "current_streak", "best_streak")
+PAIR_COLUMNS = ("wins", "losses", "draws")
+
+
+def content_record_id(result, occurrence=0):
+    # Imported rows get an ID derived from their content, so importing a file twice adds nothing.
+    # Repeats of a row within one file are numbered, so identical games stay separate rows.
+    text = "\x1f".join(str(value) for value in result)
+    if occurrence:
+        text += f"\x1e{occurrence}"
+    return hashlib.sha1(text.encode()).hexdigest()[:32]
+
+
+class Aggregates:
+    """Per-player and head-to-head tallies, updated one result at a time in game order.
+
+    `players` maps (player, mode) to STAT_COLUMNS values and `pairs` maps
+    (player, opponent, mode) to PAIR_COLUMNS values. current_streak counts
+    consecutive wins and is reset by a loss or a draw.
+    """
+
+    def __init__(self):
+        self.players = {}
+        self.pairs = {}
+
+    def add(self, player1, player2, winner, mode):
+        sides = ((player1, player2),) if player1 == player2 else ((player1, player2), (player2, player1))
+        for player, opponent in sides:
+            outcome = 2 if winner == "Draw" else (0 if winner == player else 1)
+            stats = self.players.setdefault((player, mode), [0, 0, 0, 0, 0])
+            stats[outcome] += 1
+            stats[3] = stats[3] + 1 if outcome == 0 else 0
+            stats[4] = max(stats[4], stats[3])
+            if player != opponent:
+                self.pairs.setdefault((player, opponent, mode), [0, 0, 0])[outcome] += 1
+
+
+class Storage:
+    """Schema, migrations and queries for project_results on one database engine.
+
+    Subclasses supply the dialect: the driver's parameter marker, the
+    clause that skips duplicate record IDs, column types and the catalog
+    lookups. Everything runs through a database.ConnectionPool.
+    """
+
+    backend = None
+    placeholder = "?"
+    skip_duplicates = ""
+    id_column = ""
+    row_id = "id"  # increases with every insert; what incremental exports resume from
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.migrated = False
+
+    def migrations(self):
+        # (version, name, step); applied in order and recorded in schema_migrations.
+        return (
+            (1, "create project_results", self.create_results_table),
+            (2, "add unique record_id", self.add_record_ids),
+            (3, "index player, mode and date", self.add_indexes),
+            (4, "add leaderboard and head-to-head aggregates", self.create_aggregate_tables),
+            (5, "add row ids", self.add_row_ids),
+        )
+
+    def migrate(self):
+        """Bring the schema up to date; returns True once every migration is applied."""
+        if not self.pool.execute("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                                 "version INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+                                 "applied_at VARCHAR(32) NOT NULL)"):
+            return False
+        rows = self.pool.query("SELECT version FROM schema_migrations")
+        if rows is None:
+            return False
+        applied = {row[0] for row in rows}
+        for version, name, step in self.migrations():
+            if version in applied:
+                continue
+            if not step():
+                print(f"The error 'migration {version} ({name}) failed' occurred")
+                return False
+            self.pool.execute(f"INSERT INTO schema_migrations (version, name, applied_at) VALUES "
+                              f"({self.placeholder}, {self.placeholder}, {self.placeholder})",
+                              (version, name, datetime.datetime.now().isoformat(timespec="seconds")))
+            print(f"Applied migration {version}: {name}")
+        self.migrated = True
+        return True
+
+    def create_results_table(self):
+        return self.pool.execute(f"""
+        CREATE TABLE IF NOT EXISTS project_results (
+            {self.id_column},
+            player1 VARCHAR(100) NOT NULL,
+            player2 VARCHAR(100) NOT NULL,
+            winner VARCHAR(100) NOT NULL,
+            mode VARCHAR(16) NOT NULL,
+            game_date DATE NOT NULL,
+            game_time TIME NOT NULL
+        )
+        """)
+
+    def add_record_ids(self):
+        if not self.has_column("project_results", "record_id"):
+            if not self.pool.execute("ALTER TABLE project_results ADD COLUMN record_id CHAR(32) NULL"):
+                return False
+        return self.create_index("uq_results_record_id", "record_id", unique=True)
+
+    def add_indexes(self):
+        # Player lookups are split by column so each side of a UNION uses its own index.
+        return (self.create_index("idx_results_player1", "player1, game_date")
+                and self.create_index("idx_results_player2", "player2, game_date")
+                and self.create_index("idx_results_mode_date", "mode, game_date")
+                and self.create_index("idx_results_date", "game_date"))
+
+    def add_row_ids(self):
+        # Tables created by migration 1 already have one.
+        return True
+
+    def create_aggregate_tables(self):
+        counters = ", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in STAT_COLUMNS)
+        pair_counters = ", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in PAIR_COLUMNS)
+        return (self.pool.execute(f"""
+                CREATE TABLE IF NOT EXISTS player_stats (
+                    player VARCHAR(100) NOT NULL,
+                    mode VARCHAR(16) NOT NULL,
+                    {counters},
+                    PRIMARY KEY (player, mode)
+                )
+                """)
+                and self.pool.execute(f"""
+                CREATE TABLE IF NOT EXISTS head_to_head (
+                    player VARCHAR(100) NOT NULL,
+                    opponent VARCHAR(100) NOT NULL,
+                    mode VARCHAR(16) NOT NULL,
+                    {pair_counters},
+                    PRIMARY KEY (player, opponent, mode)
+                )
+                """)
+                # Leaderboards walk this index from the top and stop after N rows.
+                and self.create_index("idx_player_stats_board", "mode, wins DESC, player", table="player_stats")
+                # The rebuild orders by row ID, which migration 5 adds to legacy MySQL tables.
+                and self.add_row_ids()
+                and self.rebuild_aggregates())
+
+    def create_index(self, name, columns, unique=False, table="project_results"):
+        if self.has_index(table, name):
+            return True
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        return self.pool.execute(f"CREATE {kind} {name} ON {table} ({columns})")
+
+    def has_column(self, table, column):
+        raise NotImplementedError
+
+    def has_index(self, table, name):
+        raise NotImplementedError
+
+    def ensure_schema(self):
+        return self.migrated or self.migrate()
+
+    def insert_query(self):
+        markers = ", ".join([self.placeholder] * len(RESULT_COLUMNS))
+        return (f"INSERT INTO project_results ({', '.join(RESULT_COLUMNS)}) VALUES ({markers})"
+                + self.skip_duplicates)
+
+    def upsert_clause(self, keys, columns):
+        raise NotImplementedError
+
+    def upsert_query(self, table, keys, columns):
+        markers = ", ".join([self.placeholder] * (len(keys) + len(columns)))
+        return (f"INSERT INTO {table} ({', '.join(keys + columns)}) VALUES ({markers})"
+                + self.upsert_clause(keys, columns))
+
+    def insert_results(self, records):
+        """Insert (record_id, player1, ..., game_time) tuples and update the aggregates in one transaction.
+
+        Records whose record_id is already stored are skipped, so a replayed
+        batch is neither inserted nor counted twice.
+        """
+        if not self.ensure_schema():
+            return False
+
+        def work(cursor):
+            markers = ", ".join([self.placeholder] * len(records))
+            cursor.execute(f"SELECT record_id FROM project_results WHERE record_id IN ({markers})",
+                           [record[0] for record in records])
+            seen = {row[0] for row in cursor.fetchall()}
+            new = []
+            for record in records:
+                if record[0] not in seen:
+                    seen.add(record[0])
+                    new.append(tuple(record))
+            if not new:
+                return
+            cursor.executemany(self.insert_query(), new)
+            aggregates = self.load_aggregates(cursor, new)
+            for record in new:
+                aggregates.add(*record[1:5])
+            self.write_aggregates(cursor, aggregates)
+
+        return self.pool.transaction(work)
+
+    def load_aggregates(self, cursor, records):
+        # The stored tallies for every player and pairing in `records`.
+        aggregates = Aggregates()
+        players = {(player, record[4]) for record in records for player in record[1:3]}
+        pairs = {(player, opponent, record[4]) for record in records
+                 for player, opponent in ((record[1], record[2]), (record[2], record[1])) if player != opponent}
+        for table, keys, columns, rows, target in (
+                ("player_stats", ("player", "mode"), STAT_COLUMNS, players, aggregates.players),
+                ("head_to_head", ("player", "opponent", "mode"), PAIR_COLUMNS, pairs, aggregates.pairs)):
+            if not rows:
+                continue
+            row_marker = "(" + ", ".join([self.placeholder] * len(keys)) + ")"
+            cursor.execute(f"SELECT {', '.join(keys + columns)} FROM {table} "
+                           f"WHERE ({', '.join(keys)}) IN ({', '.join([row_marker] * len(rows))})",
+                           [value for key in rows for value in key])
+            for row in cursor.fetchall():
+                target[tuple(row[:len(keys)])] = list(row[len(keys):])
+        return aggregates
+
+    def write_aggregates(self, cursor, aggregates):
+        if aggregates.players:
+            cursor.executemany(self.upsert_query("player_stats", ("player", "mode"), STAT_COLUMNS),
+                               [key + tuple(values) for key, values in aggregates.players.items()])
+        if aggregates.pairs:
+            cursor.executemany(self.upsert_query("head_to_head", ("player", "opponent", "mode"), PAIR_COLUMNS),
+                               [key + tuple(values) for key, values in aggregates.pairs.items()])
+
+    def rebuild_aggregates(self):
+        """Recompute player_stats and head_to_head from project_results in one streaming pass.
+
+        Raw rows are read in game order a batch at a time, so memory grows
+        with the number of players, not of games. The old aggregates are
+        replaced in the same transaction.
+        """
+
+        def work(cursor):
+            aggregates = Aggregates()
+            # The row ID breaks ties between games in the same second in insertion order, as they were applied.
+            cursor.execute(f"SELECT player1, player2, winner, mode FROM project_results "
+                           f"ORDER BY game_date, game_time, {self.row_id}")
+            while True:
+                rows = cursor.fetchmany(REBUILD_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    aggregates.add(*row)
+            cursor.execute("DELETE FROM player_stats")
+            cursor.execute("DELETE FROM head_to_head")
+            self.write_aggregates(cursor, aggregates)
+
+        return self.pool.transaction(work)
+
+    def leaderboard(self, mode, limit=10):
+        """Top players of a mode as (player, wins, losses, draws, best_streak), most wins first.
+
+        Reads the first `limit` entries of idx_player_stats_board, so the cost
+        does not grow with the number of games played.
+        """
+        if not self.ensure_schema():
+            return None
+        return self.pool.query(f"SELECT player, wins, losses, draws, best_streak FROM player_stats "
+                               f"WHERE mode = {self.placeholder} ORDER BY wins DESC, player LIMIT {int(limit)}",
+                               (mode,))
+
+    def player_stats(self, player):
+        """A player's (mode, wins, losses, draws, current_streak, best_streak) for every mode played."""
+        if not self.ensure_schema():
+            return None
+        return self.pool.query(f"SELECT mode, {', '.join(STAT_COLUMNS)} FROM player_stats "
+                               f"WHERE player = {self.placeholder} ORDER BY mode", (player,))
+
+    def head_to_head(self, player, opponent):
+        """`player`'s (mode, wins, losses, draws) against `opponent`, per mode."""
+        if not self.ensure_schema():
+            return None
+        return self.pool.query(f"SELECT mode, {', '.join(PAIR_COLUMNS)} FROM head_to_head "
+                               f"WHERE player = {self.placeholder} AND opponent = {self.placeholder} ORDER BY mode",
+                               (player, opponent))
+
+    def bulk_load(self, results, batch_size=BULK_BATCH_SIZE):
+        """Import historical results quickly; returns the number of rows sent, or None on failure.
+
+        `results` yields tuples in RESULT_COLUMNS order, or without the
+        leading record_id, in which case one is derived from the content and
+        the number of identical rows before it. Rows go in `batch_size` at a time, one transaction per batch, and the
+        aggregates are rebuilt once at the end.
+        """
+        if not self.ensure_schema():
+            return None
+        query = self.insert_query()
+        sent = 0
+        batch = []
+        occurrences = {}  # content ID -> identical rows seen so far
+        for result in results:
+            result = tuple(result)
+            if len(result) == len(RESULT_COLUMNS) - 1:
+                record_id = content_record_id(result)
+                occurrence = occurrences.get(record_id, 0)
+                occurrences[record_id] = occurrence + 1
+                result = (content_record_id(result, occurrence) if occurrence else record_id,) + result
+            batch.append(result)
+            if len(batch) >= batch_size:
+                if not self.pool.executemany(query, batch):
+                    return None
+                sent += len(batch)
+                batch = []
+        if batch:
+            if not self.pool.executemany(query, batch):
+                return None
+            sent += len(batch)
+        # One streaming pass is faster than updating the aggregates row by row.
+        if not self.rebuild_aggregates():
+            return None
+        return sent
+
+    def player_results(self, player, limit=20):
+        """A player's most recent games, newest first, as (player1, player2, winner, mode, game_date, game_time)."""
+        if not self.ensure_schema():
+            return None
+        columns = "player1, player2, winner, mode, game_date, game_time"
+        marker = self.placeholder
+        # The second branch skips games the player played against themselves, already in the first.
+        rows = self.pool.query(
+            f"SELECT {columns} FROM project_results WHERE player1 = {marker} "
+            f"UNION ALL SELECT {columns} FROM project_results WHERE player2 = {marker} AND player1 <> {marker} "
+            f"ORDER BY game_date DESC, game_time DESC LIMIT {int(limit)}",
+            (player, player, player))
+        return None if rows is None else [tuple(row) for row in rows]
+
+    def iter_results(self, after=0, fetch_size=EXPORT_FETCH_SIZE):
+        """Yield lists of up to `fetch_size` (row_id,) + RESULT_COLUMNS rows with a row ID above `after`.
+
+        Rows come in row ID order from one query, read a batch at a time from
+        the cursor (an unbuffered, server-side one on MySQL), so memory does
+        not grow with the table. Holds one pool connection until exhausted.
+        """
+        if not self.ensure_schema():
+            return
+        with self.pool.connection() as connection:
+            if connection is None:
+                return
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"SELECT {self.row_id}, {', '.join(RESULT_COLUMNS)} FROM project_results "
+                               f"WHERE {self.row_id} > {self.placeholder} ORDER BY {self.row_id}", (int(after),))
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    yield rows
+            except DB_ERRORS as e:
+                print(f"The error '{e}' occurred")
+            finally:
+                cursor.close()
+
+    def mode_results(self, mode, since=None):
+        """Games of one board mode, optionally only from the date `since` on."""
+        if not self.ensure_schema():
+            return None
+        query = ("SELECT player1, player2, winner, mode, game_date, game_time FROM project_results "
+                 f"WHERE mode = {self.placeholder}")
+        params = [mode]
+        if since is not None:
+            query += f" AND game_date >= {self.placeholder}"
+            params.append(str(since))
+        return self.pool.query(query + " ORDER BY game_date, game_time", params)
+
+
+class MySQLStorage(Storage):
+    backend = "mysql"
+    placeholder = "%s"
+    skip_duplicates = " ON DUPLICATE KEY UPDATE record_id = record_id"
+    id_column = "id INT AUTO_INCREMENT PRIMARY KEY"
+
+    def add_row_ids(self):
+        # Tables from before migration 1 have no id column; number their rows in insertion order.
+        if self.has_column("project_results", "id"):
+            return True
+        return self.pool.execute("ALTER TABLE project_results ADD COLUMN id INT AUTO_INCREMENT PRIMARY KEY FIRST")
+
+    def upsert_clause(self, keys, columns):
+        return " ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in columns)
+
+    def has_column(self, table, column):
+        rows = self.pool.query("SELECT 1 FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+                               "AND TABLE_NAME = %s AND COLUMN_NAME = %s", (table, column))
+        return bool(rows)
+
+    def has_index(self, table, name):
+        rows = self.pool.query("SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                               "AND TABLE_NAME = %s AND INDEX_NAME = %s", (table, name))
+        return bool(rows)
+
+
+class SQLiteStorage(Storage):
+    backend = "sqlite"
+    placeholder = "?"
+    skip_duplicates = " ON CONFLICT(record_id) DO NOTHING"
+    id_column = "id INTEGER PRIMARY KEY AUTOINCREMENT"
+    # Every table has one; on tables made by migration 1 it is the id column.
+    row_id = "rowid"
+
+    def upsert_clause(self, keys, columns):
+        return (f" ON CONFLICT({', '.join(keys)}) DO UPDATE SET "
+                + ", ".join(f"{column} = excluded.{column}" for column in columns))
+
+    def has_column(self, table, column):
+        rows = self.pool.query(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in rows or ())
+
+    def has_index(self, table, name):
+        rows = self.pool.query("SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name = ?",
+                               (table, name))
+        return bool(rows)
+
+
+STORAGE_BACKENDS = {
+    "mysql": MySQLStorage,
+    "sqlite": SQLiteStorage,
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage(config=None):
+    """The process-wide Storage for the configured backend, on the process-wide pool."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            config = config or load_db_config()
+            _storage = STORAGE_BACKENDS[config["backend"]](get_pool(config))
+        return _storage
+
+
+def close_storage():
+    global _storage
+    with _storage_lock:
+        _storage = None
+    close_pool()
+
+
+class ResultWriter:
+    """Spools game results to a local file and writes them to the database in the background.
+
+    submit() appends the result to the spool file (flushed and fsynced)
+    and returns; the database is only touched by a daemon thread. The
+    thread sends spooled records in batches of up to `batch_size` with one
+    parameterized executemany, once `batch_size` are waiting or the oldest
+    has waited `flush_interval` seconds, and retries every
+    `retry_interval` seconds while the database is down.
+
+    Each record carries a random record_id and Storage.insert_results
+    skips IDs that are already stored.
+    After a batch commits, the byte offset of the last sent record is saved
+    next to the spool; a restart resends everything after it. A batch that
+    committed just before a crash is resent too and skipped by its IDs, so
+    every result is stored exactly once.
+    """
+
+    def __init__(self, storage=None, spool_path=None, batch_size=50, flush_interval=1.0, retry_interval=5.0):
+        self.storage = storage  # None: the process-wide storage, opened on the writer thread
+        self.spool_path = spool_path or load_db_config()["spool_path"]
+        self.offset_path = self.spool_path + ".offset"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.pending = deque()  # (record, end offset in the spool, time queued)
+        self.counters = {"written": 0, "batches": 0, "failed_batches": 0, "replayed": 0}
+        self.write_ms = {"last": 0.0, "max": 0.0, "total": 0.0}
+        self.load_spool()
+        self.counters["replayed"] = len(self.pending)
+        self.spool = open(self.spool_path, "ab")
+        self.thread = threading.Thread(target=self.run, name="result-writer", daemon=True)
+        self.thread.start()
+
+    def load_spool(self):
+        # Queue the records after the saved offset and drop a torn last line.
+        try:
+            with open(self.offset_path) as f:
+                offset = int(f.read() or 0)
+        except (OSError, ValueError):
+            offset = 0
+        try:
+            with open(self.spool_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            with open(self.spool_path, "r+b") as f:
+                f.truncate(end)
+        if offset > end:
+            offset = 0  # The spool was compacted after the offset was saved.
+        position = offset
+        now = time.monotonic()
+        for line in data[offset:end].splitlines(keepends=True):
+            position += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"The error '{e}' occurred")
+                continue
+            self.pending.append((tuple(record[column] for column in RESULT_COLUMNS), position, now))
+
+    def submit(self, result):
+        """Spool one result (player1, player2, winner, mode, game_date, game_time); returns its record_id."""
+        record = (uuid4().hex,) + tuple(result)
+        line = json.dumps(dict(zip(RESULT_COLUMNS, record))).encode() + b"\n"
+        with self.lock:
+            self.spool.write(line)
+            self.spool.flush()
+            os.fsync(self.spool.fileno())
+            self.pending.append((record, self.spool.tell(), time.monotonic()))
+            if len(self.pending) >= self.batch_size:
+                self.wakeup.set()
+        return record[0]
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            with self.lock:
+                stopping = self.stopping
+                due = self.pending and (len(self.pending) >= self.batch_size or stopping
+                                        or time.monotonic() - self.pending[0][2] >= self.flush_interval)
+            if due and not self.send_pending() and not stopping:
+                # Database down: keep the records spooled and try again later.
+                self.wakeup.wait(self.retry_interval)
+                continue
+            if stopping:
+                return
+
+    def send_pending(self):
+        """Send every pending record in batches; returns False if a batch failed."""
+        while True:
+            with self.lock:
+                batch = [self.pending[i] for i in range(min(self.batch_size, len(self.pending)))]
+            if not batch:
+                return True
+            if not self.write([record for record, _, _ in batch]):
+                return False
+            self.mark_sent(len(batch), batch[-1][1])
+
+    def write(self, records):
+        storage = self.storage or get_storage()
+        start = time.perf_counter()
+        ok = storage.insert_results(records)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self.lock:
+            if ok:
+                self.counters["written"] += len(records)
+                self.counters["batches"] += 1
+            else:
+                self.counters["failed_batches"] += 1
+            self.write_ms["last"] = elapsed_ms
+            self.write_ms["max"] = max(self.write_ms["max"], elapsed_ms)
+            self.write_ms["total"] += elapsed_ms
+        return ok
+
+    def mark_sent(self, count, offset):
+        with self.lock:
+            for _ in range(count):
+                self.pending.popleft()
+            if not self.pending:
+                # Everything is stored: start the spool afresh.
+                self.spool.truncate(0)
+                self.spool.seek(0)
+                offset = 0
+            self.save_offset(offset)
+
+    def save_offset(self, offset):
+        temp_path = self.offset_path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.offset_path)
+
+    def flush(self, timeout=None):
+        """Wait until nothing is pending; returns False if records are still unsent after `timeout`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.wakeup.set()
+        while self.pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        """Pending (spooled, unsent) record count, counters and batch write latency in milliseconds."""
+        with self.lock:
+            attempts = self.counters["batches"] + self.counters["failed_batches"]
+            return dict(self.counters, depth=len(self.pending),
+                        last_write_ms=self.write_ms["last"], max_write_ms=self.write_ms["max"],
+                        mean_write_ms=self.write_ms["total"] / attempts if attempts else 0.0)
+
+    def close(self):
+        """Make one last attempt to send what is pending; anything unsent stays spooled for next time."""
+        with self.lock:
+            self.stopping = True
+        self.wakeup.set()
+        self.thread.join()
+        self.spool.close()
+
+
+def read_csv_results(path):
+    # Rows of a CSV export with a header naming RESULT_COLUMNS; record_id may be missing.
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        columns = RESULT_COLUMNS if "record_id" in reader.fieldnames else RESULT_COLUMNS[1:]
+        for row in reader:
+            yield tuple(row[column] for column in columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the game results database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="create or upgrade the schema")
+    load = commands.add_parser("import", help="bulk load results from a CSV file")
+    load.add_argument("path")
+    load.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    history = commands.add_parser("history", help="show a player's recent games")
+    history.add_argument("player")
+    history.add_argument("--limit", type=int, default=20)
+    commands.add_parser("rebuild", help="recompute the leaderboard aggregates from the raw results")
+    board = commands.add_parser("leaderboard", help="show the top players of a board mode")
+    board.add_argument("mode")
+    board.add_argument("--limit", type=int, default=10)
+    stats = commands.add_parser("stats", help="show a player's totals per mode")
+    stats.add_argument("player")
+    args = parser.parse_args()
+
+    storage = get_storage()
+    if args.command == "migrate":
+        storage.migrate()
+    elif args.command == "import":
+        start = time.perf_counter()
+        sent = storage.bulk_load(read_csv_results(args.path), args.batch_size)
+        if sent is not None:
+            elapsed = time.perf_counter() - start
+            print(f"Loaded {sent} rows in {elapsed:.2f}s ({sent / elapsed if elapsed else 0:,.0f} rows/s)")
+    elif args.command == "history":
+        for row in storage.player_results(args.player, args.limit) or ():
+            print(*row)
+    elif args.command == "rebuild":
+        start = time.perf_counter()
+        if storage.ensure_schema() and storage.rebuild_aggregates():
+            print(f"Rebuilt aggregates in {time.perf_counter() - start:.2f}s")
+    elif args.command == "leaderboard":
+        for rank, row in enumerate(storage.leaderboard(args.mode, args.limit) or (), 1):
+            print(rank, *row)
+    elif args.command == "stats":
+        for row in storage.player_stats(args.player) or ():
+            print(*row)
+    close_storage()
+
+
+if __name__ == "__main__":
+    main()
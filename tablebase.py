@@ -0,0 +1,237 @@
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import time
+from array import array
+from bitboard import count_exact_runs, get_masks
+from rules import get_rules, win_conditions
+
+# File layout: header, then the reachable positions' canonical indexes as
+# ascending uint32s, then one entry byte per position in the same order.
+# A position's index is the base-3 number sum(value(cell) * 3**(row * size + col))
+# with empty = 0, X = 1, O = 2; its canonical index is the smallest index over
+# the eight board symmetries, so each position is stored once. The entry byte
+# holds the game-theoretic value for the side to move in its top bits and the
+# best move's cell number (row * size + col), in the canonical orientation, in
+# the low 5 bits.
+MAGIC = b"TTTB"
+VERSION = 2
+HEADER = struct.Struct("<4sBB6sI4x")  # magic, version, size, mode, positions
+
+UNKNOWN, WIN, LOSS, DRAW = 0, 1, 2, 3
+NO_MOVE = 31
+
+# Modes small enough to solve; all are square.
+TABLEBASE_MODES = ("3x3", "4x4")
+
+
+def tablebase_path(mode):
+    return f"tablebase_{mode}.bin"
+
+
+def has_won(bits, masks, mode):
+    for length, needed in win_conditions(mode):
+        if count_exact_runs(bits, masks, length) >= needed:
+            return True
+    return False
+
+
+def bit_indices(bits):
+    indices = []
+    while bits:
+        low = bits & -bits
+        indices.append(low.bit_length() - 1)
+        bits ^= low
+    return indices
+
+
+def symmetry_powers(masks, size):
+    """powers[s][bit] is the base-3 weight of the cell at mask bit `bit` seen through symmetry s;
+    cell_numbers[s][bit] is that cell's number."""
+    powers = []
+    cell_numbers = []
+    for table in masks.symmetries:
+        weights = [0] * (size * masks.stride)
+        numbers = [0] * (size * masks.stride)
+        for r in range(size):
+            for c in range(size):
+                tr, tc = table[r][c]
+                bit = r * masks.stride + c
+                weights[bit] = 3 ** (tr * size + tc)
+                numbers[bit] = tr * size + tc
+        powers.append(weights)
+        cell_numbers.append(numbers)
+    return powers, cell_numbers
+
+
+def symmetric_indices(powers, x, o):
+    xs = bit_indices(x)
+    os_ = bit_indices(o)
+    return [sum(weights[i] for i in xs) + 2 * sum(weights[i] for i in os_) for weights in powers]
+
+
+class Solver:
+    """Retrograde solver for one mode.
+
+    Positions are generated forward one layer (number of marks) at a time and
+    deduplicated under the eight board symmetries, then solved backward from
+    the last layer, so every child is resolved before its parents.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.size = get_rules(mode).rows
+        self.masks = get_masks(self.size)
+        self.cells = self.size * self.size
+        self.powers, self.cell_numbers = symmetry_powers(self.masks, self.size)
+
+    def indices(self, x, o):
+        return symmetric_indices(self.powers, x, o)
+
+    def canonical_index(self, x, o):
+        return min(self.indices(x, o))
+
+    def is_terminal(self, x, o, marks):
+        if marks == 0:
+            return False
+        # Only the player who just moved can have won.
+        last = x if marks % 2 else o
+        return has_won(last, self.masks, self.mode) or marks == self.cells
+
+    def children(self, x, o, marks):
+        empty = self.masks.full & ~(x | o)
+        x_to_move = marks % 2 == 0
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            if x_to_move:
+                yield bit, x | bit, o
+            else:
+                yield bit, x, o | bit
+
+    def solve(self, progress=None):
+        layers = [{} for _ in range(self.cells + 1)]
+        layers[0][0] = (0, 0)
+        for marks in range(self.cells):
+            for x, o in layers[marks].values():
+                if self.is_terminal(x, o, marks):
+                    continue
+                for _, cx, co in self.children(x, o, marks):
+                    layers[marks + 1].setdefault(self.canonical_index(cx, co), (cx, co))
+            if progress:
+                progress(f"layer {marks + 1}: {len(layers[marks + 1])} positions")
+
+        # results[marks][index] = (value, plies to the end, best move mask bit)
+        results = [None] * (self.cells + 1)
+        for marks in range(self.cells, -1, -1):
+            solved = {}
+            for index, (x, o) in layers[marks].items():
+                if marks and has_won(x if marks % 2 else o, self.masks, self.mode):
+                    solved[index] = (LOSS, 0, None)
+                    continue
+                if marks == self.cells:
+                    solved[index] = (DRAW, 0, None)
+                    continue
+                best = None
+                for bit, cx, co in self.children(x, o, marks):
+                    child_value, child_plies, _ = results[marks + 1][self.canonical_index(cx, co)]
+                    # Prefer winning, then drawing; win fast and lose slowly.
+                    if child_value == LOSS:
+                        rank = (2, -child_plies)
+                        value = WIN
+                    elif child_value == DRAW:
+                        rank = (1, 0)
+                        value = DRAW
+                    else:
+                        rank = (0, child_plies)
+                        value = LOSS
+                    if best is None or rank > best[0]:
+                        best = (rank, value, child_plies + 1, bit.bit_length() - 1)
+                solved[index] = best[1:]
+            results[marks] = solved
+            if progress:
+                progress(f"solved layer {marks}")
+        return layers, results
+
+    def write(self, path, progress=None):
+        layers, results = self.solve(progress)
+        entries = {}
+        for marks, layer in enumerate(layers):
+            for index, (x, o) in layer.items():
+                value, _, move = results[marks][index]
+                # The stored representative may be any orientation; record the move in the canonical one.
+                symmetry = self.indices(x, o).index(index)
+                cell = NO_MOVE if move is None else self.cell_numbers[symmetry][move]
+                entries[index] = (value << 5) | cell
+        indexes = array("I", sorted(entries))
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.size, self.mode.encode("ascii"), len(indexes)))
+            indexes.tofile(f)
+            f.write(bytes(entries[index] for index in indexes))
+
+
+class Tablebase:
+    """Read-only, memory-mapped view of a solved table."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size or self._mmap[:5] != MAGIC + bytes((VERSION,)):
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {VERSION} tablebase; rebuild it")
+        _, _, size, mode, self.count = HEADER.unpack_from(self._mmap, 0)
+        self.size = size
+        self.mode = mode.rstrip(b"\0").decode("ascii")
+        self.masks = get_masks(size)
+        self.powers, _ = symmetry_powers(self.masks, size)
+        self.indexes = memoryview(self._mmap)[HEADER.size:HEADER.size + 4 * self.count].cast("I")
+        self.entries_offset = HEADER.size + 4 * self.count
+
+    def probe(self, board):
+        """Return (value, move) for the side to move, or None if the position is not in the table."""
+        indices = symmetric_indices(self.powers, board.bits["X"], board.bits["O"])
+        index = min(indices)
+        symmetry = indices.index(index)
+        i = bisect.bisect_left(self.indexes, index)
+        if i == self.count or self.indexes[i] != index:
+            return None
+        entry = self._mmap[self.entries_offset + i]
+        value = entry >> 5
+        if value == UNKNOWN:
+            return None
+        cell = entry & 31
+        if cell == NO_MOVE:
+            return value, None
+        return value, self.masks.inverse_symmetries[symmetry][cell // self.size][cell % self.size]
+
+    def close(self):
+        self.indexes.release()
+        self._mmap.close()
+
+
+def load_tablebase(mode, path=None):
+    path = path or tablebase_path(mode)
+    if not os.path.exists(path):
+        return None
+    try:
+        return Tablebase(path)
+    except (OSError, ValueError) as e:
+        print(f"The error '{e}' occurred")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a board mode and write its tablebase.")
+    parser.add_argument("mode", choices=sorted(TABLEBASE_MODES))
+    parser.add_argument("--output", help="output file (default: tablebase_<mode>.bin)")
+    args = parser.parse_args()
+    path = args.output or tablebase_path(args.mode)
+    start = time.perf_counter()
+    Solver(args.mode).write(path, progress=print)
+    print(f"Wrote {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+from move_log import RESULT_X, MoveLog, MoveLogWriter
+
+
+def test_long_non_ascii_names_round_trip(tmp_path):
+    path = str(tmp_path / "games.tttm")
+    writer = MoveLogWriter(path)
+    writer.append([("X", 0, 0), ("O", 1, 1), ("X", 0, 1)], "3x3", 3, 3, "ä" * 300, "€" * 100, RESULT_X)
+    writer.close()
+    log = MoveLog(path)
+    try:
+        record = log[0]
+        assert record.player1 == "ä" * 127
+        assert record.player2 == "€" * 85
+        assert list(record.iter_moves()) == [("X", 0, 0), ("O", 1, 1), ("X", 0, 1)]
+    finally:
+        log.close()
@@ -0,0 +1,146 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ai_player import BACKENDS, DIFFICULTIES, AIPlayer
+from bitboard import BitBoard
+from rules import MODES, get_rules
+
+# Each side in a tournament process searches on a single core; the pool supplies the parallelism.
+PLAYER_WORKERS = 1
+
+
+def parse_player(spec):
+    """Parse an AI configuration such as "hard" or "medium:mcts" into (difficulty, backend)."""
+    difficulty, _, backend = spec.partition(":")
+    backend = backend or "search"
+    if difficulty not in DIFFICULTIES or backend not in BACKENDS:
+        raise argparse.ArgumentTypeError(
+            f"Bad AI {spec!r}: expected one of {', '.join(DIFFICULTIES)}, "
+            f"optionally followed by :{' / :'.join(BACKENDS)}")
+    return difficulty, backend
+
+
+def play_game(game, mode, x_player, o_player, seed, budgets=None):
+    """Play one headless game between two (difficulty, backend) AIs.
+
+    Moves come from AIPlayer.choose_move and the result from
+    BitBoard.winner / is_full, as in the pygame game. Returns a dict with the
+    game number, winner ("X", "O" or None), move count, elapsed seconds and
+    per-move latencies in milliseconds for each side.
+    """
+    rng = random.Random(seed)
+    rules = get_rules(mode)
+    board = BitBoard(rules.rows, rules.cols)
+    ais = {"X": AIPlayer(PLAYER_WORKERS, budgets), "O": AIPlayer(PLAYER_WORKERS, budgets)}
+    configs = {"X": x_player, "O": o_player}
+    latencies = {"X": [], "O": []}
+    winner = None
+    player = "X"
+    start = time.perf_counter()
+    try:
+        while True:
+            difficulty, backend = configs[player]
+            move_start = time.perf_counter()
+            move = ais[player].choose_move(board, mode, difficulty, player, backend, rng)
+            latencies[player].append((time.perf_counter() - move_start) * 1000)
+            board.place(move[0], move[1], player)
+            winner = board.winner(mode)
+            if winner or board.is_full():
+                break
+            player = "O" if player == "X" else "X"
+    finally:
+        for ai in ais.values():
+            ai.close()
+    return {
+        "game": game,
+        "winner": winner,
+        "moves": len(latencies["X"]) + len(latencies["O"]),
+        "elapsed": time.perf_counter() - start,
+        "latencies": latencies,
+    }
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of an already sorted list.
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_tournament(mode, player_a, player_b, games, processes, seed=0, alternate=False, budgets=None):
+    """Play `games` games between two AI configurations on a process pool.
+
+    With `alternate`, player B takes "X" in every odd-numbered game. Prints
+    one line per finished game and then the aggregate report; returns the
+    per-game results in game order.
+    """
+    names = {"A": ":".join(player_a), "B": ":".join(player_b)}
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {}
+        for game in range(games):
+            swapped = alternate and game % 2 == 1
+            sides = {"X": "B", "O": "A"} if swapped else {"X": "A", "O": "B"}
+            x_player, o_player = (player_b, player_a) if swapped else (player_a, player_b)
+            future = pool.submit(play_game, game, mode, x_player, o_player, seed + game, budgets)
+            futures[future] = sides
+        for future in as_completed(futures):
+            result = future.result()
+            result["sides"] = futures[future]
+            results.append(result)
+            winner = result["winner"]
+            outcome = f"{winner} ({names[result['sides'][winner]]}) wins" if winner else "draw"
+            print(f"game {result['game']}: {outcome} in {result['moves']} moves, {result['elapsed']:.2f}s",
+                  flush=True)
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda result: result["game"])
+    report(results, names, elapsed)
+    return results
+
+
+def report(results, names, elapsed):
+    games = len(results)
+    wins = {"A": 0, "B": 0}
+    colour_wins = {"X": 0, "O": 0}
+    latencies = {"A": [], "B": []}
+    for result in results:
+        if result["winner"]:
+            wins[result["sides"][result["winner"]]] += 1
+            colour_wins[result["winner"]] += 1
+        for player, side in result["sides"].items():
+            latencies[side].extend(result["latencies"][player])
+    draws = games - wins["A"] - wins["B"]
+    print(f"{games} games in {elapsed:.2f}s = {games / elapsed:.2f} games/s")
+    for side in ("A", "B"):
+        print(f"{side} {names[side]}: {wins[side]} wins ({wins[side] / games:.1%})")
+    print(f"draws: {draws} ({draws / games:.1%}); X won {colour_wins['X']}, O won {colour_wins['O']}")
+    for side in ("A", "B"):
+        values = sorted(latencies[side])
+        print(f"{side} move latency ms: p50 {percentile(values, 0.5):.1f}, p90 {percentile(values, 0.9):.1f}, "
+              f"p99 {percentile(values, 0.99):.1f}, max {values[-1] if values else 0.0:.1f} "
+              f"over {len(values)} moves")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless games between two AI configurations.")
+    parser.add_argument("player_a", type=parse_player, help='AI level, e.g. "hard" or "medium:mcts"')
+    parser.add_argument("player_b", type=parse_player)
+    parser.add_argument("--mode", default="3x3", choices=sorted(MODES))
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--alternate", action="store_true", help="swap X and O every other game")
+    parser.add_argument("--budget-ms", type=int, help="override the per-move budget of medium and hard")
+    args = parser.parse_args()
+    budgets = None
+    if args.budget_ms is not None:
+        budgets = {difficulty: args.budget_ms for difficulty in ("medium", "hard")}
+    run_tournament(args.mode, args.player_a, args.player_b, args.games, args.processes,
+                   args.seed, args.alternate, budgets)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+EXACT = 0
+LOWER = 1  # The stored value is a lower bound (the search failed high).
+UPPER = 2  # The stored value is an upper bound (the search failed low).
+
+
+class TranspositionTable:
+    """Fixed-size table of search results keyed by canonical Zobrist hashes.
+
+    Each slot holds (key, depth, value, flag, move, generation). A slot is
+    overwritten when it is empty, holds the same position, was written by an
+    earlier search, or was searched to a smaller depth than the new result.
+    """
+
+    def __init__(self, max_entries=1 << 16):
+        self.max_entries = max_entries
+        self.slots = [None] * max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def new_search(self):
+        # Entries from earlier searches stay usable but become replaceable.
+        self.generation += 1
+
+    def probe(self, key):
+        entry = self.slots[key % self.max_entries]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = key % self.max_entries
+        existing = self.slots[index]
+        if (existing is None or existing[0] == key or existing[5] != self.generation
+                or depth >= existing[1]):
+            self.slots[index] = (key, depth, value, flag, move, self.generation)
+            self.stores += 1
+
+    def clear(self):
+        self.slots = [None] * self.max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
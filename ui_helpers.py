@@ -13,6 +13,17 @@ DARK_GRAY = (100, 100, 100)
 FONT = pygame.font.SysFont("Verdana", 30)
 SMALL_FONT = pygame.font.SysFont("Verdana", 24)
 
+_CELL_FONTS = {}
+
+def cell_font(cell_size):
+    # Marks use FONT unless the cell is too small for it (large boards).
+    if cell_size >= 50:
+        return FONT
+    font = _CELL_FONTS.get(cell_size)
+    if font is None:
+        font = _CELL_FONTS[cell_size] = pygame.font.SysFont("Verdana", max(10, cell_size * 3 // 5))
+    return font
+
 class TextInputBox:
     def __init__(self, x, y, w, h, text=''):
         self.rect = pygame.Rect(x, y, w, h)
@@ -72,14 +83,14 @@ class Cell(pygame.sprite.Sprite):
     def mark(self, player, color):
         if self.value is None:
             self.value = player
-            text_surface = FONT.render(player, True, color)
+            text_surface = cell_font(self.size).render(player, True, color)
             text_rect = text_surface.get_rect(center=(self.size // 2, self.size // 2))
             self.image.blit(text_surface, text_rect)
 
-def create_cells(x_offset, y_offset, cell_size, board_size):
+def create_cells(x_offset, y_offset, cell_size, rows, cols=None):
     cells = pygame.sprite.Group()
-    for row in range(board_size):
-        for col in range(board_size):
+    for row in range(rows):
+        for col in range(rows if cols is None else cols):
             cell = Cell(row, col, cell_size, x_offset, y_offset)
             cells.add(cell)
     return cells